@@ -0,0 +1,94 @@
+"""Vérifie que les certificats générés sont identiques, pixel par pixel, au dessin d'origine.
+
+Le générateur pré-calcule des bandes de feuilles et les descriptions de
+chaque formulaire. Ce script redessine chaque certificat comme le faisait
+la première version (template, feuilles une par une, puis descriptions et
+labels par-dessus) et compare les pixels avec CertificateGenerator.
+Les descriptions sur plusieurs lignes du formulaire complet recouvrent les
+feuilles : l'ordre des couches y est visible.
+
+Exemple :
+    python benchmarks/check_rendering.py "input/product and service form - full.csv"
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+# Ajouter la racine du projet au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageDraw
+
+from src.main import create_generator_config
+from src.models.score_models import Evaluation
+from src.services.batch_renderer import select_evaluation
+from src.services.certificate_generator import CertificateGenerator
+from src.services.csv_parser import CsvParser
+from src.services.score_calculator import ScoreCalculator
+
+COMPONENT_SIZE = 5
+DEFAULT_FORMS = [
+    Path("input/product and service form - small.csv"),
+    Path("input/product and service form - full.csv")
+]
+
+
+def reference_certificate(generator: CertificateGenerator, score: Evaluation) -> Image.Image:
+    """Dessine un certificat comme la première version du générateur, sans aucun cache"""
+    certificate = generator.template.copy()
+    for criterion, position in (
+        (score.local_evaluation, generator.local_position),
+        (score.ecofriendly_evaluation, generator.eco_position),
+        (score.living_respect_evaluation, generator.living_position)
+    ):
+        for i in range(criterion.total_questions):
+            leaf = generator.active_leaf if i < criterion.yes_count else generator.inactive_leaf
+            certificate.paste(leaf, (position.x + i * generator.leaf_spacing, position.y), leaf.split()[3])
+
+    draw = ImageDraw.Draw(certificate)
+    for criterion, position in (
+        (score.local_evaluation, generator.local_description_position),
+        (score.ecofriendly_evaluation, generator.eco_description_position),
+        (score.living_respect_evaluation, generator.living_description_position)
+    ):
+        draw.text((position.x, position.y), criterion.description, font=generator.description_font, fill=(0, 0, 0))
+    if score.labels:
+        draw.text((generator.label_position.x, generator.label_position.y), ", ".join(score.labels),
+                  font=generator.font, fill=(0, 0, 0))
+    return certificate
+
+
+def check_form(generator: CertificateGenerator, csv_path: Path) -> List[str]:
+    """Compare les certificats d'un formulaire et retourne les noms des produits différents"""
+    parser = CsvParser(csv_path, score_component_size=COMPONENT_SIZE, verbose=False)
+    calculator = ScoreCalculator(component_size=COMPONENT_SIZE)
+    different = []
+    count = 0
+    for product in map(calculator.transform_product, parser.iter_products()):
+        score = select_evaluation(product)
+        count += 1
+        if generator.render_certificate(score).tobytes() != reference_certificate(generator, score).tobytes():
+            different.append(product.name)
+    print(f"{csv_path} : {count - len(different)}/{count} certificats identiques")
+    return different
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Compare les certificats au dessin d'origine")
+    arg_parser.add_argument("forms", type=Path, nargs="*", default=DEFAULT_FORMS, help="Formulaires CSV à vérifier")
+    args = arg_parser.parse_args()
+
+    generator = CertificateGenerator(**create_generator_config())
+    failed = False
+    for csv_path in args.forms:
+        different = check_form(generator, csv_path)
+        for name in different:
+            print(f"  différent : {name}")
+        failed = failed or bool(different)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
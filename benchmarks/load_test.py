@@ -0,0 +1,171 @@
+"""Test de charge du service HTTP de certificats (src/server.py).
+
+Envoie des requêtes POST /certificate avec plusieurs connexions simultanées
+et mesure la latence (p50, p90, p99) et le débit côté client. Les réponses
+des produits sont tirées au hasard parmi --distinct produits différents :
+moins il y en a, plus le cache du service est utilisé.
+
+Exemple :
+    python src/server.py --port 8080 &
+    python benchmarks/load_test.py --port 8080 --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Ajouter la racine du projet au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.services.render_service import percentile
+
+LABELS = ["Bioclothing", "EU Ecolabel", "Fairtrade", "FSC", "GOTS", "Nordic Swan"]
+
+
+def random_payload(rng: random.Random, index: int, yes_rate: float, component_size: int) -> Dict[str, Any]:
+    """Réponses JSON d'un produit synthétique"""
+    def evaluation() -> Dict[str, Any]:
+        return {
+            "answers": [
+                ["Yes" if rng.random() < yes_rate else "No" for _ in range(component_size)]
+                for _ in range(3)
+            ],
+            "labels": rng.sample(LABELS, rng.randint(0, 3))
+        }
+
+    use_product = rng.random() < 0.7
+    return {
+        "name": f"Produit {index}",
+        "product": evaluation() if use_product else None,
+        "service": None if use_product else evaluation()
+    }
+
+
+async def read_response(reader: asyncio.StreamReader):
+    """Lit une réponse HTTP : code, en-têtes (en minuscules) et corps"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connexion fermée par le service")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return status, headers, body
+
+
+async def request(reader, writer, host: str, method: str, path: str, body: bytes = b""):
+    """Envoie une requête sur une connexion keep-alive et lit la réponse"""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    return await read_response(reader)
+
+
+async def client(
+    args,
+    payloads: List[bytes],
+    counter: List[int],
+    latencies: List[float],
+    errors: Dict[int, int],
+    rng: random.Random
+) -> None:
+    """Une connexion qui envoie des requêtes jusqu'à épuisement du nombre total"""
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while counter[0] < args.requests:
+            counter[0] += 1
+            body = rng.choice(payloads)
+            start = time.perf_counter()
+            status, _, _ = await request(reader, writer, args.host, "POST", "/certificate", body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(args) -> Dict[str, Any]:
+    """Exécute le test de charge et retourne les résultats"""
+    rng = random.Random(args.seed)
+    payloads = [
+        json.dumps(random_payload(rng, index, args.yes_rate, args.component_size)).encode("utf-8")
+        for index in range(args.distinct)
+    ]
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    counter = [0]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(args, payloads, counter, latencies, errors, random.Random(args.seed + 1 + i))
+        for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    results = {
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "distinct_products": args.distinct,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3),
+    }
+    for name, fraction in (("p50_ms", 0.50), ("p90_ms", 0.90), ("p99_ms", 0.99)):
+        results[name] = round(percentile(latencies, fraction) * 1000, 3) if latencies else None
+    results["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else None
+
+    # Mesures vues par le service
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        _, _, body = await request(reader, writer, args.host, "GET", "/metrics")
+        results["service"] = json.loads(body)
+    finally:
+        writer.close()
+    return results
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Test de charge du service de certificats")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="Adresse du service")
+    arg_parser.add_argument("--port", type=int, default=8080, help="Port du service")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="Connexions simultanées")
+    arg_parser.add_argument("--requests", type=int, default=500, help="Nombre total de requêtes")
+    arg_parser.add_argument("--distinct", type=int, default=100, help="Nombre de produits différents envoyés")
+    arg_parser.add_argument("--yes-rate", type=float, default=0.5, help="Probabilité d'une réponse Yes")
+    arg_parser.add_argument("--component-size", type=int, default=5, help="Nombre de questions par critère")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Graine des produits générés")
+    arg_parser.add_argument("--output", type=Path, default=None, help="Fichier JSON des résultats (optionnel)")
+    args = arg_parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{results['requests']} requêtes en {results['seconds']:.2f} s "
+          f"({results['throughput_rps']:.1f} req/s, {args.concurrency} connexions)")
+    print(f"Latence : p50 {results['p50_ms']:.1f} ms, p90 {results['p90_ms']:.1f} ms, "
+          f"p99 {results['p99_ms']:.1f} ms, max {results['max_ms']:.1f} ms")
+    if results["errors"]:
+        print(f"Erreurs : {results['errors']}")
+    service = results["service"]
+    print(f"Service : {service['batches']['count']} lots (taille moyenne {service['batches']['mean_size']}), "
+          f"cache {service['cache']['hits']} hits / {service['cache']['misses']} misses")
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Benchmarks de bout en bout de la génération de certificats.
+
+Pour chaque taille de formulaire, un CSV synthétique est généré puis chaque
+étape est mesurée séparément : parsing (pandas, streaming et compact),
+scoring (par ligne et vectorisé), dessin, encodage, écriture, puis la chaîne
+complète.
+Les étapes qui créent un objet par ligne sont limitées à --object-limit
+lignes, et le dessin, l'encodage et l'écriture à --render-limit certificats ;
+chaque résultat indique le nombre d'éléments réellement traités.
+
+Les résultats sont écrits en JSON, et --compare affiche l'évolution par
+rapport à un fichier de résultats précédent.
+
+Exemple :
+    python benchmarks/run_benchmarks.py --sizes 10 10000 --compare benchmarks/results/abc123.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# Ajouter la racine du projet au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_form import AnswerDistribution, write_synthetic_form
+from src.main import create_generator_config
+from src.services.batch_renderer import BatchRenderer, CertificateJob, certificate_filename, select_evaluation
+from src.services.certificate_encoder import CertificateEncoder
+from src.services.certificate_generator import CertificateGenerator
+from src.services.certificate_sink import DirectorySink
+from src.services.csv_parser import CsvParser
+from src.services.pipeline import PipelineRenderer
+from src.services.render_cache import RenderCache
+from src.services.render_manifest import config_digest
+from src.services.score_calculator import ScoreCalculator
+
+COMPONENT_SIZE = 5
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def measure(function: Callable[[], int]) -> Dict[str, Any]:
+    """Mesure une étape ; la fonction retourne le nombre d'éléments traités"""
+    start = time.perf_counter()
+    items = function()
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 6),
+        "items": items,
+        "per_item_us": round(seconds / items * 1e6, 3) if items else None
+    }
+
+
+def run_size(rows: int, work_dir: Path, args) -> Dict[str, Any]:
+    """Exécute tous les benchmarks pour un formulaire de rows lignes"""
+    csv_path = work_dir / f"form-{rows}.csv"
+    distribution = AnswerDistribution(yes_rate=args.yes_rate, empty_rate=args.empty_rate)
+    write_synthetic_form(csv_path, rows, distribution, seed=args.seed)
+
+    calculator = ScoreCalculator(component_size=COMPONENT_SIZE)
+    object_rows = min(rows, args.object_limit)
+    render_count = min(rows, args.render_limit)
+    results: Dict[str, Any] = {}
+
+    def parser(compact: bool = False) -> CsvParser:
+        return CsvParser(csv_path, score_component_size=COMPONENT_SIZE, verbose=False, compact=compact)
+
+    # Parsing
+    results["parse_stream"] = measure(lambda: sum(1 for _ in parser().iter_products()))
+    results["parse_compact"] = measure(lambda: sum(1 for _ in parser(compact=True).iter_products()))
+    if rows <= args.object_limit:
+        results["parse_pandas"] = measure(lambda: len(parser().parse_products()))
+
+    # Scoring
+    csv_products = list(itertools.islice(parser().iter_products(), object_rows))
+    results["score_rows"] = measure(lambda: len(calculator.transform_products(csv_products)))
+    compact_products = list(itertools.islice(parser(compact=True).iter_products(), object_rows))
+    results["score_compact"] = measure(lambda: len(calculator.transform_products(compact_products)))
+    answers = None
+
+    def read_answers() -> int:
+        nonlocal answers
+        answers = parser().answer_table()
+        return len(answers)
+
+    results["answer_table"] = measure(read_answers)
+    codes = calculator.encode_answers(answers)
+    results["score_table"] = measure(lambda: len(calculator.score_table(codes)))
+
+    # Dessin, encodage et écriture, mesurés séparément
+    scores = [select_evaluation(p) for p in calculator.transform_products(csv_products[:render_count])]
+    generator = CertificateGenerator(**create_generator_config(CertificateEncoder()))
+    sink = DirectorySink(work_dir / f"certificates-{rows}")
+    timings = {"render": 0.0, "encode": 0.0, "write": 0.0}
+    for index, score in enumerate(scores):
+        start = time.perf_counter()
+        image = generator.render_certificate(score)
+        rendered = time.perf_counter()
+        data = generator.encoder.encode(image)
+        encoded = time.perf_counter()
+        sink.write(f"{index}.png", data)
+        timings["render"] += rendered - start
+        timings["encode"] += encoded - rendered
+        timings["write"] += time.perf_counter() - encoded
+    for stage, seconds in timings.items():
+        results[stage] = {
+            "seconds": round(seconds, 6),
+            "items": len(scores),
+            "per_item_us": round(seconds / len(scores) * 1e6, 3) if scores else None
+        }
+
+    # Chaîne complète : parsing et scoring de toutes les lignes, génération des render_count premiers
+    def pipeline() -> int:
+        generator_config = create_generator_config(CertificateEncoder())
+        render_cache = RenderCache(config_digest(generator_config))
+        pipeline_sink = DirectorySink(work_dir / f"pipeline-{rows}")
+        renderer = BatchRenderer(generator_config, pipeline_sink, jobs=args.jobs, render_cache=render_cache)
+        certificate_jobs = []
+        count = 0
+        for csv_product in parser(compact=True).iter_products():
+            product = calculator.transform_product(csv_product)
+            count += 1
+            if len(certificate_jobs) < render_count:
+                filename = certificate_filename(product.name)
+                certificate_jobs.append(CertificateJob(score=select_evaluation(product), filename=filename))
+        renderer.render(certificate_jobs)
+        return count
+
+    results["pipeline"] = measure(pipeline)
+    results["pipeline"]["certificates"] = render_count
+
+    # Même chaîne en flux : lecture, dessin, encodage et écriture se recouvrent
+    def streaming_pipeline() -> int:
+        generator_config = create_generator_config(CertificateEncoder())
+        render_cache = RenderCache(config_digest(generator_config))
+        renderer = PipelineRenderer(
+            generator_config, DirectorySink(work_dir / f"streaming-{rows}"), render_cache=render_cache
+        )
+        count = 0
+
+        def certificate_jobs():
+            nonlocal count
+            for csv_product in parser(compact=True).iter_products():
+                product = calculator.transform_product(csv_product)
+                count += 1
+                if count <= render_count:
+                    yield CertificateJob(score=select_evaluation(product), filename=certificate_filename(product.name))
+
+        renderer.render(certificate_jobs())
+        return count
+
+    results["streaming"] = measure(streaming_pipeline)
+    results["streaming"]["certificates"] = render_count
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Commit courant du dépôt, None hors d'un dépôt git"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], previous_path: Path) -> None:
+    """Affiche le rapport des durées par rapport à un fichier de résultats précédent"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\nComparaison avec {previous_path} (commit {previous.get('commit')}) :")
+    for size, stages in results["results"].items():
+        for stage, result in stages.items():
+            old = previous.get("results", {}).get(size, {}).get(stage)
+            if not old or not old.get("per_item_us") or not result.get("per_item_us"):
+                continue
+            ratio = result["per_item_us"] / old["per_item_us"]
+            print(f"  {size:>8} lignes  {stage:<14} {old['per_item_us']:>12.3f} -> "
+                  f"{result['per_item_us']:>12.3f} µs/élément  (x{ratio:.2f})")
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Benchmarks de la génération de certificats")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10_000, 1_000_000],
+                            help="Nombres de lignes des formulaires")
+    arg_parser.add_argument("--render-limit", type=int, default=50,
+                            help="Nombre maximal de certificats dessinés par taille")
+    arg_parser.add_argument("--object-limit", type=int, default=100_000,
+                            help="Nombre maximal de lignes pour les étapes qui créent un objet par ligne")
+    arg_parser.add_argument("--jobs", type=int, default=1, help="Processus pour la chaîne complète")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Graine des formulaires synthétiques")
+    arg_parser.add_argument("--yes-rate", type=float, default=0.5, help="Probabilité d'une réponse Yes")
+    arg_parser.add_argument("--empty-rate", type=float, default=0.1, help="Probabilité d'une question sans réponse")
+    arg_parser.add_argument("--work-dir", type=Path, default=None,
+                            help="Dossier des fichiers générés (temporaire par défaut)")
+    arg_parser.add_argument("--output", type=Path, default=None,
+                            help="Fichier JSON des résultats (benchmarks/results/<commit>.json par défaut)")
+    arg_parser.add_argument("--compare", type=Path, default=None,
+                            help="Fichier de résultats précédent à comparer")
+    args = arg_parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "render_limit": args.render_limit,
+            "object_limit": args.object_limit,
+            "jobs": args.jobs,
+            "seed": args.seed,
+            "yes_rate": args.yes_rate,
+            "empty_rate": args.empty_rate
+        },
+        "results": {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or Path(tmp_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+        for rows in args.sizes:
+            print(f"Benchmark avec {rows} lignes...")
+            results["results"][str(rows)] = stages = run_size(rows, work_dir, args)
+            for stage, result in stages.items():
+                print(f"  {stage:<14} {result['seconds']:>10.3f} s  ({result['items']} éléments)")
+
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats écrits dans {output}")
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Génère des formulaires produits/services synthétiques pour les benchmarks.
+
+Les lignes d'en-tête sont recopiées d'un formulaire existant : les fichiers
+générés ont donc exactement le schéma attendu par CsvParser. Les réponses
+suivent une distribution contrôlable et reproductible (graine fixe).
+
+Exemple :
+    python benchmarks/synthetic_form.py /tmp/form.csv --rows 10000 --yes-rate 0.7
+"""
+import argparse
+import csv
+import random
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+# Ajouter la racine du projet au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.services.csv_parser import CsvParser, HEADER_ROWS
+
+DEFAULT_TEMPLATE = Path("input/product and service form - small.csv")
+LABELS = ["Bioclothing", "EU Ecolabel", "Fairtrade", "FSC", "GOTS", "Nordic Swan"]
+
+
+@dataclass
+class AnswerDistribution:
+    """Distribution des réponses des formulaires générés.
+
+    Args:
+        yes_rate: Probabilité qu'une réponse soit "Yes" (sinon "No")
+        empty_rate: Probabilité qu'une question reste sans réponse
+        service_rate: Part des lignes qui décrivent un service plutôt qu'un produit
+        label_rate: Probabilité que chacun des 3 labels soit renseigné
+    """
+    yes_rate: float = 0.5
+    empty_rate: float = 0.1
+    service_rate: float = 0.3
+    label_rate: float = 0.2
+
+
+def write_synthetic_form(
+    output_path: Path,
+    rows: int,
+    distribution: AnswerDistribution = AnswerDistribution(),
+    seed: int = 0,
+    template_path: Path = DEFAULT_TEMPLATE,
+    score_component_size: int = 5
+) -> Path:
+    """Écrit un formulaire CSV synthétique.
+
+    Args:
+        output_path: Fichier CSV à écrire
+        rows: Nombre de produits/services
+        distribution: Distribution des réponses
+        seed: Graine du générateur aléatoire
+        template_path: Formulaire dont les lignes d'en-tête sont recopiées
+        score_component_size: Nombre de questions par critère
+
+    Returns:
+        Chemin du fichier écrit
+    """
+    layout_parser = CsvParser(template_path, score_component_size=score_component_size)
+    layouts = (layout_parser.product_layout, layout_parser.service_layout)
+    rng = random.Random(seed)
+
+    with open(template_path, newline="", encoding="utf-8-sig") as template:
+        reader = csv.reader(template)
+        header_records = [next(reader) for _ in range(1 + HEADER_ROWS)]
+    width = len(header_records[1])
+
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerows(header_records)
+        for index in range(rows):
+            record = [""] * width
+            is_service = rng.random() < distribution.service_rate
+            record[0] = str(100000 + index)
+            record[1] = "simple, virtual" if is_service else "simple"
+            record[2] = f"sku-{index}"
+            record[3] = f"{'Service' if is_service else 'Product'} {index}"
+
+            layout = layouts[1] if is_service else layouts[0]
+            for score_layout in layout.scores:
+                for col_index in score_layout.column_indices:
+                    if rng.random() >= distribution.empty_rate:
+                        record[col_index] = "Yes" if rng.random() < distribution.yes_rate else "No"
+            for label_index in layout.label_indices:
+                if rng.random() < distribution.label_rate:
+                    record[label_index] = rng.choice(LABELS)
+            writer.writerow(record)
+
+    return output_path
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Génère un formulaire produits/services synthétique")
+    arg_parser.add_argument("output", type=Path, help="Fichier CSV à écrire")
+    arg_parser.add_argument("--rows", type=int, default=1000, help="Nombre de produits/services")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Graine du générateur aléatoire")
+    arg_parser.add_argument("--yes-rate", type=float, default=0.5, help="Probabilité d'une réponse Yes")
+    arg_parser.add_argument("--empty-rate", type=float, default=0.1, help="Probabilité d'une question sans réponse")
+    arg_parser.add_argument("--service-rate", type=float, default=0.3, help="Part des services")
+    arg_parser.add_argument("--label-rate", type=float, default=0.2, help="Probabilité de chaque label")
+    arg_parser.add_argument("--template", type=Path, default=DEFAULT_TEMPLATE, help="Formulaire modèle")
+    args = arg_parser.parse_args()
+
+    distribution = AnswerDistribution(
+        yes_rate=args.yes_rate,
+        empty_rate=args.empty_rate,
+        service_rate=args.service_rate,
+        label_rate=args.label_rate
+    )
+    write_synthetic_form(args.output, args.rows, distribution, seed=args.seed, template_path=args.template)
+    print(f"Formulaire généré : {args.output} ({args.rows} lignes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Génération des certificats de plusieurs formulaires en un seul lancement.
+
+Les formulaires sont donnés par fichiers, dossiers (tous leurs .csv) ou
+motifs glob. Un seul générateur (ou un seul pool de workers) sert à tous
+les fichiers : les images et polices ne sont chargées qu'une fois, et les
+colonnes des formulaires aux en-têtes identiques ne sont recherchées
+qu'une fois. Chaque formulaire a son dossier (ou son archive) dans
+--output-dir, nommé d'après le fichier.
+
+Exemple :
+    python src/batch.py "input/*.csv" --output-dir output/batch --jobs 0
+"""
+from pathlib import Path
+import argparse
+import csv
+import glob
+import sys
+import time
+from typing import List
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main import create_generator_config
+from src.services.batch_renderer import BatchRenderer, CertificateJob, certificate_filename, select_evaluation
+from src.services.certificate_encoder import CertificateEncoder, FORMAT_EXTENSIONS
+from src.services.certificate_sink import DirectorySink, ZipSink
+from src.services.csv_parser import CsvParser, LayoutCache
+from src.services.metrics import TimingMetrics
+from src.services.render_cache import RenderCache
+from src.services.render_manifest import config_digest
+from src.services.score_calculator import ScoreCalculator
+
+
+def find_forms(patterns: List[str]) -> List[Path]:
+    """Fichiers CSV désignés par des chemins, dossiers ou motifs glob, sans doublons"""
+    forms = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.csv"))
+        elif glob.has_magic(pattern):
+            matches = sorted(Path(match) for match in glob.glob(pattern))
+        else:
+            matches = [path]
+        for match in matches:
+            if match not in forms:
+                forms.append(match)
+    return forms
+
+
+def output_names(forms: List[Path]) -> List[str]:
+    """Nom du dossier de sortie de chaque formulaire (nom du fichier, numéroté en cas de doublon)"""
+    names = []
+    for form in forms:
+        name = form.stem
+        number = 2
+        while name in names:
+            name = f"{form.stem}-{number}"
+            number += 1
+        names.append(name)
+    return names
+
+
+def parse_args():
+    """Lit les options de la ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Génère les certificats de plusieurs formulaires")
+    arg_parser.add_argument("forms", nargs="+", help="Fichiers CSV, dossiers ou motifs glob (ex: \"input/*.csv\")")
+    arg_parser.add_argument("--output-dir", type=Path, default=Path("output"),
+                            help="Dossier contenant un dossier (ou une archive) par formulaire")
+    arg_parser.add_argument("--zip", action="store_true",
+                            help="Écrit chaque formulaire dans une archive <nom>.zip plutôt qu'un dossier")
+    arg_parser.add_argument("--jobs", "-j", type=int, default=1,
+                            help="Processus de génération partagés par tous les fichiers (1 = en série, 0 = un par cœur)")
+    arg_parser.add_argument("--format", choices=[f.lower() for f in FORMAT_EXTENSIONS], default="png",
+                            help="Format des images de certificats")
+    arg_parser.add_argument("--png-compress-level", type=int, choices=range(10), default=None,
+                            help="Niveau de compression PNG (0 = rapide, 9 = compact)")
+    arg_parser.add_argument("--scale", type=float, default=1.0, help="Facteur d'échelle des certificats")
+    arg_parser.add_argument("--asset-cache-dir", type=Path, default=None,
+                            help="Dossier du cache des images décodées")
+    arg_parser.add_argument("--no-render-cache", action="store_true",
+                            help="Génère chaque certificat même s'il est identique à un certificat déjà généré")
+    arg_parser.add_argument("--render-cache-dir", type=Path, default=None,
+                            help="Dossier où conserver les certificats générés entre les exécutions")
+    arg_parser.add_argument("--quiet", "-q", action="store_true", help="N'affiche que le résumé de chaque fichier")
+    arg_parser.add_argument("--metrics-report", type=Path, default=None,
+                            help="Écrit les durées de chaque étape dans ce fichier JSON")
+    args = arg_parser.parse_args()
+    if args.scale <= 0:
+        arg_parser.error("--scale doit être positif")
+    return args
+
+
+def run(args) -> int:
+    """Génère les certificats de chaque formulaire et retourne le nombre de fichiers en erreur."""
+    forms = find_forms(args.forms)
+    if not forms:
+        print("Aucun formulaire trouvé")
+        return 1
+
+    metrics = TimingMetrics(per_item=False)
+    encoder = CertificateEncoder(format=args.format.upper(), compress_level=args.png_compress_level)
+    generator_config = create_generator_config(encoder, args.asset_cache_dir, args.scale)
+    render_cache = None
+    if not args.no_render_cache:
+        render_cache = RenderCache(config_digest(generator_config), directory=args.render_cache_dir,
+                                   extension=encoder.extension)
+    layout_cache = LayoutCache()
+    calculator = ScoreCalculator(component_size=5, metrics=metrics)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    failures = 0
+    total_products = 0
+    # Un seul renderer : générateur chargé une fois, ou pool de workers gardé entre les fichiers
+    renderer = BatchRenderer(generator_config, DirectorySink(args.output_dir), jobs=args.jobs,
+                             render_cache=render_cache, metrics=metrics)
+    with renderer:
+        for form, name in zip(forms, output_names(forms)):
+            form_start = time.perf_counter()
+            known_layouts = len(layout_cache)
+            try:
+                parser = CsvParser(form, score_component_size=5, verbose=not args.quiet, metrics=metrics,
+                                   compact=True, layout_cache=layout_cache)
+                certificate_jobs = [
+                    CertificateJob(
+                        score=select_evaluation(product),
+                        filename=certificate_filename(product.name, encoder.extension)
+                    )
+                    for product in map(calculator.transform_product, parser.iter_products())
+                ]
+            except (OSError, ValueError, IndexError, csv.Error) as error:
+                failures += 1
+                print(f"{form} : erreur, fichier ignoré ({error})")
+                continue
+
+            if args.zip:
+                destination = args.output_dir / f"{name}.zip"
+                sink = ZipSink(destination)
+            else:
+                destination = args.output_dir / name
+                sink = DirectorySink(destination)
+            renderer.sink = sink
+            if render_cache is not None:
+                # Les chemins écrits pour le fichier précédent ne sont pas dans cette destination
+                render_cache.forget_written()
+            with sink, metrics.span("render_form"):
+                renderer.render(certificate_jobs)
+
+            total_products += len(certificate_jobs)
+            layout = "connues" if len(layout_cache) == known_layouts else "détectées"
+            print(f"{form} : {len(certificate_jobs)} produits, certificats dans {destination} "
+                  f"({time.perf_counter() - form_start:.2f} s, colonnes {layout})")
+
+    elapsed = time.perf_counter() - start
+    stages = metrics.report()["stages"]
+    render_seconds = stages.get("render_form", {}).get("total_seconds", 0.0)
+    print(f"\nFormulaires traités : {len(forms) - failures}/{len(forms)}, produits : {total_products}")
+    print(f"Durée totale : {elapsed:.2f} s, dont génération : {render_seconds:.2f} s")
+    print(f"En-têtes distincts : {len(layout_cache)} (colonnes réutilisées pour {layout_cache.hits} fichiers)")
+    if render_cache is not None:
+        print(f"Rendus évités grâce au cache : {render_cache.renders_saved}")
+    if args.metrics_report is not None:
+        metrics.write_json(args.metrics_report)
+        print(f"Mesures écrites dans : {args.metrics_report}")
+    return failures
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    sys.exit(1 if run(parse_args()) else 0)
+
+
+if __name__ == "__main__":
+    main()
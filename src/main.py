@@ -1,25 +1,233 @@
 from pathlib import Path
+import argparse
+import os
 import sys
-from dataclasses import asdict
-import json
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Début de l'import des modules du programme, pour --profile-startup
+_IMPORT_START = time.perf_counter()
 
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.append(str(Path(__file__).parent.parent))
 
-from services.csv_parser import CsvParser
-from services.score_calculator import ScoreCalculator
-from services.certificate_generator import CertificateGenerator, ElementPosition
+from src.services.csv_parser import CsvParser
+from src.services.score_calculator import ScoreCalculator
+from src.services.certificate_generator import CertificateGenerator, ElementPosition
+from src.services.batch_renderer import BatchRenderer, CertificateJob, certificate_filename, select_evaluation
+from src.services.certificate_encoder import CertificateEncoder, FORMAT_EXTENSIONS
+from src.services.certificate_sink import DirectorySink, PdfSink, ZipSink
+from src.services.render_cache import RenderCache
+from src.services.metrics import TimingMetrics
+from src.services.render_manifest import RenderManifest, config_digest
+from src.services.sharding import ShardManifest, ShardSpec, merge_shards
+from src.services.score_report import ScoreReport, print_summary
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
-def main():
-    """Point d'entrée principal."""
-    # Créer le parser et le calculateur
-    parser = CsvParser(Path("input/product and service form - small.csv"), score_component_size=5)
-    calculator = ScoreCalculator(component_size=5)
-    
-    # Configurer le générateur de certificats
+# Sous-dossier des miniatures (--thumbnail-scale)
+THUMBNAILS_DIR = "thumbnails"
+
+# Dépendances lourdes dont --profile-startup indique si elles ont été chargées
+HEAVY_MODULES = ("pandas", "numpy", "PIL", "concurrent.futures", "zipfile")
+
+
+def parse_args():
+    """Lit les options de la ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Génère les certificats d'éco-score")
+    arg_parser.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="Nombre de processus de génération (1 = en série, 0 = un par cœur)"
+    )
+    arg_parser.add_argument(
+        "--incremental", action="store_true",
+        help="Ne régénère que les certificats modifiés depuis la dernière exécution"
+    )
+    arg_parser.add_argument(
+        "--no-render-cache", action="store_true",
+        help="Génère chaque certificat même s'il est identique à un certificat déjà généré"
+    )
+    arg_parser.add_argument(
+        "--render-cache-dir", type=Path, default=None,
+        help="Dossier où conserver les certificats générés entre les exécutions"
+    )
+    arg_parser.add_argument(
+        "--hardlinks", action="store_true",
+        help="Écrit les certificats identiques comme liens physiques"
+    )
+    arg_parser.add_argument(
+        "--archive", type=Path, default=None,
+        help="Écrit les certificats directement dans cette archive ZIP au lieu du dossier output/"
+    )
+    arg_parser.add_argument(
+        "--pdf", type=Path, default=None,
+        help="Écrit tous les certificats dans ce PDF multi-pages (encodés en JPEG)"
+    )
+    arg_parser.add_argument(
+        "--format", choices=[f.lower() for f in FORMAT_EXTENSIONS], default="png",
+        help="Format des images de certificats"
+    )
+    arg_parser.add_argument(
+        "--quality", type=int, default=None,
+        help="Qualité des images WebP/JPEG (1 à 100)"
+    )
+    arg_parser.add_argument(
+        "--png-compress-level", type=int, choices=range(10), default=None,
+        help="Niveau de compression PNG (0 = rapide, 9 = compact)"
+    )
+    arg_parser.add_argument(
+        "--no-transparency", action="store_true",
+        help="Encode les certificats en RGB, sans canal alpha"
+    )
+    arg_parser.add_argument(
+        "--scale", type=float, default=1.0,
+        help="Facteur d'échelle des certificats (ex: 0.25 pour des brouillons rapides)"
+    )
+    arg_parser.add_argument(
+        "--thumbnail-scale", type=float, default=None,
+        help="Génère aussi des miniatures à cette échelle (dans output/thumbnails/ ou thumbnails/ de l'archive)"
+    )
+    arg_parser.add_argument(
+        "--quiet", "-q", action="store_true",
+        help="N'affiche pas de ligne par produit, seulement le résumé"
+    )
+    arg_parser.add_argument(
+        "--metrics-report", type=Path, default=None,
+        help="Écrit les durées de chaque étape (par produit et au total) dans ce fichier JSON"
+    )
+    arg_parser.add_argument(
+        "--profile", type=Path, default=None,
+        help="Profile l'exécution avec cProfile et écrit les statistiques (pstats) dans ce fichier"
+    )
+    arg_parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Affiche le coût du démarrage : imports, lecture des en-têtes, chargement des images et polices"
+    )
+    arg_parser.add_argument(
+        "--form-cache-dir", type=Path, default=None,
+        help="Dossier où garder le formulaire lu et scoré, rechargé tant que le CSV ne change pas"
+    )
+    arg_parser.add_argument(
+        "--form-cache-max-mb", type=int, default=256,
+        help="Taille maximale du cache des formulaires en Mo (les entrées les plus anciennes sont supprimées)"
+    )
+    arg_parser.add_argument(
+        "--clear-form-cache", action="store_true",
+        help="Supprime les entrées du formulaire dans le cache avant de le relire"
+    )
+    arg_parser.add_argument(
+        "--asset-cache-dir", type=Path, default=None,
+        help="Dossier où garder le template et les feuilles déjà décodés, partagés entre processus"
+    )
+    arg_parser.add_argument(
+        "--prepare-assets", action="store_true",
+        help="Prépare seulement le cache des images (--asset-cache-dir) puis s'arrête"
+    )
+    arg_parser.add_argument(
+        "--shard", default=None,
+        help="Ne traite que la part i/N des produits (répartis d'après leur ID), reprise possible après un arrêt"
+    )
+    arg_parser.add_argument(
+        "--shard-dir", type=Path, default=Path("output/shards"),
+        help="Dossier partagé où chaque part écrit ses certificats et son journal"
+    )
+    arg_parser.add_argument(
+        "--merge-shards", action="store_true",
+        help="Réunit les parts terminées de --shard-dir dans output/ (ou dans --archive) puis s'arrête"
+    )
+    arg_parser.add_argument(
+        "--watch", action="store_true",
+        help="Surveille les CSV de --input-dir et ne régénère que les produits ajoutés ou modifiés (output/<formulaire>/)"
+    )
+    arg_parser.add_argument(
+        "--input-dir", type=Path, default=Path("input"),
+        help="Dossier des formulaires surveillés par --watch"
+    )
+    arg_parser.add_argument(
+        "--watch-interval", type=float, default=2.0,
+        help="Secondes entre deux vérifications du dossier en mode --watch"
+    )
+    arg_parser.add_argument(
+        "--report", type=Path, default=None,
+        help="Écrit les statistiques agrégées des scores (JSON, ou CSV si le fichier finit par .csv) "
+             "à la place du détail de chaque produit"
+    )
+    arg_parser.add_argument(
+        "--report-chart", type=Path, default=None,
+        help="Trace la répartition des scores de chaque critère dans cette image (nécessite matplotlib)"
+    )
+    arg_parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Lit, dessine, encode et écrit les certificats en flux dans output/, avec des étapes qui se recouvrent "
+             "et une mémoire constante (sans --archive, --pdf, --incremental, --shard ni --thumbnail-scale)"
+    )
+    arg_parser.add_argument(
+        "--max-in-flight", type=int, default=64,
+        help="Nombre maximal de certificats en cours dans le pipeline (mémoire constante)"
+    )
+    arg_parser.add_argument(
+        "--writer-threads", type=int, default=2,
+        help="Threads d'encodage et d'écriture du pipeline"
+    )
+    args = arg_parser.parse_args()
+    if args.pipeline and (args.jobs != 1 or args.hardlinks):
+        arg_parser.error("--pipeline dessine dans un seul processus : --jobs et --hardlinks ne sont pas disponibles")
+    if args.pipeline and (args.archive is not None or args.pdf is not None or args.incremental
+                          or args.shard is not None or args.thumbnail_scale is not None):
+        arg_parser.error(
+            "--pipeline écrit en flux dans output/ sans garder la liste des produits : --archive, --pdf, "
+            "--incremental, --shard et --thumbnail-scale ne sont pas disponibles"
+        )
+    if args.max_in_flight < 1 or args.writer_threads < 1:
+        arg_parser.error("--max-in-flight et --writer-threads doivent être au moins 1")
+    if (args.report is not None or args.report_chart is not None) and (args.watch or args.merge_shards):
+        arg_parser.error("--report et --report-chart ne sont pas disponibles avec --watch ou --merge-shards")
+    if args.watch and (args.archive is not None or args.pdf is not None or args.shard is not None
+                       or args.merge_shards or args.incremental or args.thumbnail_scale is not None
+                       or args.form_cache_dir is not None):
+        arg_parser.error(
+            "--watch tient déjà les dossiers de output/ à jour : --archive, --pdf, --shard, --merge-shards, "
+            "--incremental, --thumbnail-scale et --form-cache-dir ne sont pas disponibles"
+        )
+    if args.watch_interval <= 0:
+        arg_parser.error("--watch-interval doit être positif")
+    if args.shard is not None:
+        try:
+            args.shard = ShardSpec.parse(args.shard)
+        except ValueError as error:
+            arg_parser.error(str(error))
+        if (args.archive is not None or args.pdf is not None or args.incremental
+                or args.thumbnail_scale is not None or args.form_cache_dir is not None):
+            arg_parser.error(
+                "--shard écrit dans --shard-dir et reprend déjà là où il s'est arrêté : "
+                "--archive, --pdf, --incremental, --thumbnail-scale et --form-cache-dir ne sont pas disponibles"
+            )
+    if args.merge_shards and (args.shard is not None or args.pdf is not None):
+        arg_parser.error("--merge-shards n'est pas disponible avec --shard ou --pdf")
+    if args.archive is not None and args.pdf is not None:
+        arg_parser.error("--archive et --pdf ne peuvent pas être utilisés ensemble")
+    if (args.archive is not None or args.pdf is not None) and args.incremental:
+        arg_parser.error("--incremental n'est disponible qu'avec le dossier output/")
+    if args.clear_form_cache and args.form_cache_dir is None:
+        arg_parser.error("--clear-form-cache nécessite --form-cache-dir")
+    if args.scale <= 0 or (args.thumbnail_scale is not None and args.thumbnail_scale <= 0):
+        arg_parser.error("--scale et --thumbnail-scale doivent être positifs")
+    if args.thumbnail_scale is not None and args.pdf is not None:
+        arg_parser.error("--thumbnail-scale n'est pas disponible avec --pdf")
+    if args.prepare_assets and args.asset_cache_dir is None:
+        arg_parser.error("--prepare-assets nécessite --asset-cache-dir")
+    return args
+
+
+def create_generator_config(
+    encoder: Optional[CertificateEncoder] = None,
+    asset_cache_dir: Optional[Path] = None,
+    scale: float = 1.0
+) -> Dict[str, Any]:
+    """Configuration du générateur de certificats (arguments de CertificateGenerator)."""
     x = 150
-    generator = CertificateGenerator(
+    return dict(
         certificate_template=Path("images/certificate.png"),
         active_leaf=Path("images/active-leave.png"),
         inactive_leaf=Path("images/unactive-leave.png"),
@@ -39,47 +247,315 @@ def main():
         font_path=Path("fonts/Arial Bold.ttf"),
         bold_font_path=Path("fonts/Arial Bold.ttf"),
         font_size=60,  # Taille pour les labels
-        description_font_size=50  # Taille pour les descriptions
+        description_font_size=50,  # Taille pour les descriptions
+        total_questions=5,  # Pré-calcul des bandes de feuilles
+        encoder=encoder,
+        asset_cache_dir=asset_cache_dir,
+        scale=scale  # Toutes les positions et tailles ci-dessus sont mises à l'échelle
     )
+
+
+def create_encoder(args) -> CertificateEncoder:
+    """Crée l'encodage demandé (JPEG pour un PDF)."""
+    return CertificateEncoder(
+        format="JPEG" if args.pdf is not None else args.format.upper(),
+        compress_level=args.png_compress_level,
+        quality=args.quality,
+        transparency=not args.no_transparency
+    )
+
+
+def render_certificates(
+    args, renderer, certificate_jobs, output_dir, generator_config, label="Certificats générés", rows=None,
+    on_written=None
+):
+    """Génère les certificats, uniquement ceux qui ont changé en mode incrémental ou par parts."""
+    if args.shard is not None:
+        # Chaque certificat terminé est noté aussitôt dans le journal de la part
+        manifest = ShardManifest(output_dir, generator_config, args.shard)
+        pending_jobs = manifest.pending_jobs(certificate_jobs)
+        manifest.start()
+        renderer.render(pending_jobs, on_written=lambda job: manifest.record(job, rows[job.filename]))
+        removed = manifest.finish(certificate_jobs, rows)
+        print(f"Part {args.shard} - {label.lower()} : {len(pending_jobs)}, "
+              f"déjà terminés : {len(certificate_jobs) - len(pending_jobs)}, "
+              f"supprimés : {len(removed)}")
+    elif args.incremental:
+        manifest = RenderManifest(output_dir, generator_config)
+        pending_jobs = manifest.pending_jobs(certificate_jobs)
+        renderer.render(pending_jobs)
+        removed = manifest.update(certificate_jobs)
+        manifest.save()
+        print(f"{label} : {len(pending_jobs)}, "
+              f"inchangés : {len(certificate_jobs) - len(pending_jobs)}, "
+              f"supprimés : {len(removed)}")
+    else:
+        renderer.render(certificate_jobs, on_written=on_written)
+
+
+def print_product_details(product, destination, extension):
+    """Affiche les scores d'un produit et le chemin de son certificat."""
+    print(product)
+    print(f"Certificat généré : {destination}/{certificate_filename(product.name, extension)}")
+    print("=" * 50)
+
+
+def render_thumbnails(args, sink, certificate_jobs, output_dir, generator_config, metrics):
+    """Génère les miniatures, dessinées directement à leur taille plutôt que réduites."""
+    thumbnail_config = dict(generator_config, scale=args.thumbnail_scale)
+    render_cache = None
+    if not args.no_render_cache:
+        render_cache = RenderCache(
+            config_digest(thumbnail_config),
+            directory=args.render_cache_dir,
+            use_hardlinks=args.hardlinks,
+            extension=thumbnail_config["encoder"].extension
+        )
     
-    # Créer le dossier output s'il n'existe pas
+    if args.archive is not None:
+        # Dans la même archive, sous thumbnails/
+        thumbnail_dir = None
+        thumbnail_sink = sink
+        thumbnail_jobs = [
+            CertificateJob(score=job.score, filename=f"{THUMBNAILS_DIR}/{job.filename}") for job in certificate_jobs
+        ]
+    else:
+        thumbnail_dir = output_dir / THUMBNAILS_DIR
+        thumbnail_sink = DirectorySink(thumbnail_dir)
+        thumbnail_jobs = certificate_jobs
+    renderer = BatchRenderer(thumbnail_config, thumbnail_sink, jobs=args.jobs, render_cache=render_cache, metrics=metrics)
+    render_certificates(args, renderer, thumbnail_jobs, thumbnail_dir, thumbnail_config, label="Miniatures générées")
+
+
+def merge_shard_outputs(args):
+    """Réunit les certificats des parts dans output/ ou dans l'archive demandée."""
     output_dir = Path("output")
-    output_dir.mkdir(exist_ok=True)
+    sink = ZipSink(args.archive) if args.archive is not None else DirectorySink(output_dir)
+    try:
+        merged = merge_shards(args.shard_dir, sink)
+    except ValueError as error:
+        sys.exit(f"Fusion impossible : {error}")
+    print(f"Parts réunies : {merged['shards']}, certificats : {len(merged['certificates'])}")
+    print(f"Destination : {args.archive or output_dir}")
+
+
+def watch_forms(args, generator_config, render_cache, metrics):
+    """Tient à jour les certificats des formulaires du dossier d'entrée jusqu'à l'interruption."""
+    from src.services.form_watcher import FormWatcher
+    watcher = FormWatcher(
+        args.input_dir, Path("output"), generator_config, jobs=args.jobs,
+        render_cache=render_cache, verbose=not args.quiet, metrics=metrics
+    )
+    print(f"Surveillance de {args.input_dir} toutes les {args.watch_interval:g} s (Ctrl+C pour arrêter)")
+    try:
+        while True:
+            for changes in watcher.poll():
+                print(changes)
+            time.sleep(args.watch_interval)
+    except KeyboardInterrupt:
+        print("\nSurveillance arrêtée")
+
+
+def score_rows(parser, calculator, report=None):
+    """(ligne, produit scoré) de chaque produit lu, ajouté au rapport au passage."""
+    for row, csv_product in parser.iter_indexed_products():
+        product = calculator.transform_product(csv_product)
+        if report is not None:
+            report.add(csv_product, product)
+        yield row, product
+
+
+def run(args):
+    """Génère les certificats selon les options de la ligne de commande."""
+    if args.merge_shards:
+        merge_shard_outputs(args)
+        return
     
-    # Lire et traiter les produits
-    csv_products = parser.parse_products()
-    products_count = 0
+    metrics = None
+    if args.metrics_report is not None or args.profile_startup:
+        metrics = TimingMetrics(per_item=args.metrics_report is not None)
     
-    # Pour chaque produit
-    for csv_product in csv_products:
-        # Calculer les scores
-        product = calculator.transform_product(csv_product)
-        print(f"Produit traité avec succès : {product.name}")
-        products_count += 1
-        
-        # Générer le certificat avec le score approprié (product ou service)
-        score = (product.product_evaluation if product.product_evaluation.values_found 
-                else product.service_evaluation)
-        
-        # Générer le nom du fichier
-        filename = product.name.lower().replace(" ", "_") + "_certificate.png"
-        output_path = output_dir / filename
+    csv_path = Path("input/product and service form - small.csv")
+    form_cache = None
+    if args.form_cache_dir is not None:
+        # numpy n'est chargé que si le cache des formulaires est utilisé
+        from src.services.form_cache import FormCache
+        form_cache = FormCache(args.form_cache_dir, max_bytes=args.form_cache_max_mb << 20, metrics=metrics)
+        if args.clear_form_cache:
+            form_cache.invalidate(csv_path)
+    
+    # Configurer le générateur de certificats
+    generator_config = create_generator_config(create_encoder(args), args.asset_cache_dir, args.scale)
+    if args.prepare_assets:
+        CertificateGenerator(**generator_config).load_assets()
+        print(f"Images préparées dans : {args.asset_cache_dir}")
+        return
+    render_cache = None
+    if not args.no_render_cache:
+        render_cache = RenderCache(
+            config_digest(generator_config),
+            directory=args.render_cache_dir,
+            use_hardlinks=args.hardlinks,
+            extension=generator_config["encoder"].extension
+        )
+    if args.watch:
+        watch_forms(args, generator_config, render_cache, metrics)
+        return
+    
+    # Écrire dans l'archive ou le PDF demandé, ou dans le dossier output (créé s'il n'existe pas)
+    output_dir = Path("output")
+    if args.shard is not None:
+        # Dossier propre à la part, sur le système de fichiers partagé
+        output_dir = args.shard_dir / args.shard.dirname
+    if args.archive is not None:
+        sink = ZipSink(args.archive)
+    elif args.pdf is not None:
+        sink = PdfSink(args.pdf)
+    else:
+        sink = DirectorySink(output_dir)
+    extension = generator_config["encoder"].extension
+    if args.pipeline:
+        # Importé seulement en flux : threads et concurrent.futures inutiles sinon
+        from src.services.pipeline import PipelineRenderer
+        renderer = PipelineRenderer(
+            generator_config, sink, max_in_flight=args.max_in_flight, writer_threads=args.writer_threads,
+            render_cache=render_cache, metrics=metrics
+        )
+    else:
+        renderer = BatchRenderer(generator_config, sink, jobs=args.jobs, render_cache=render_cache, metrics=metrics)
+    
+    # Lire et traiter les produits
+    report = None
+    if form_cache is not None:
+        # Formulaire déjà lu et scoré lors d'une exécution précédente (ou enregistré maintenant)
+        form = form_cache.load_or_build(csv_path, score_component_size=5, verbose=not args.quiet)
+        scored_products = enumerate(form.iter_score_products())
+        if args.report is not None or args.report_chart is not None:
+            report = ScoreReport(form.schema)
+            report.add_form(form)
+    else:
+        # Créer le parser et le calculateur ; la lecture en streaming se passe de pandas
+        parser = CsvParser(
+            csv_path, score_component_size=5, verbose=not args.quiet, metrics=metrics, compact=True, shard=args.shard
+        )
+        calculator = ScoreCalculator(component_size=5, metrics=metrics)
+        if args.report is not None or args.report_chart is not None:
+            report = ScoreReport(parser.schema)
+        scored_products = score_rows(parser, calculator, report)
+    # Le détail de chaque produit n'est gardé que s'il est affiché (pas avec un rapport)
+    show_details = not args.quiet and report is None
+    destination = args.archive or args.pdf or output_dir
+    # En flux, seuls les produits en cours sont gardés : leur détail est affiché dès l'écriture
+    products = deque() if args.pipeline else []
+    on_written = None
+    if args.pipeline and show_details:
+        print("\nDétails des produits avec scores :")
+        print("=" * 50)
         
-        # Générer le certificat
-        generator.generate_certificate(score, output_path)
+        def on_written(job):
+            """Affiche le détail du produit dont le certificat vient d'être écrit (dans l'ordre de lecture)."""
+            print_product_details(products.popleft(), destination, extension)
     
-    # Afficher les détails
-    print("\nDétails des produits avec scores :")
-    print("=" * 50)
-    for csv_product in csv_products:
-        product = calculator.transform_product(csv_product)
-        print(product)
-        filename = product.name.lower().replace(" ", "_") + "_certificate.png"
-        print(f"Certificat généré : output/{filename}")
+    product_count = 0
+    # Ligne du CSV de chaque fichier, pour la fusion des parts
+    rows = {}
+    
+    def iter_certificate_jobs():
+        """Certificat de chaque produit, au fur et à mesure de la lecture."""
+        nonlocal product_count
+        # Pour chaque produit (scores calculés)
+        for row, product in scored_products:
+            if not args.quiet:
+                print(f"Produit traité avec succès : {product.name}")
+            product_count += 1
+            if show_details:
+                products.append(product)
+            
+            # Générer le certificat avec le score approprié (product ou service)
+            score = select_evaluation(product)
+            
+            # Générer le nom du fichier
+            filename = certificate_filename(product.name, extension)
+            if args.shard is not None:
+                rows[filename] = row
+            yield CertificateJob(score=score, filename=filename)
+    
+    # Le pipeline lit les produits pendant le dessin ; les autres modes ont besoin de tous les jobs
+    certificate_jobs = iter_certificate_jobs()
+    if not args.pipeline:
+        certificate_jobs = list(certificate_jobs)
+    
+    # Générer les certificats
+    with sink:
+        render_certificates(args, renderer, certificate_jobs, output_dir, generator_config, rows=rows,
+                            on_written=on_written)
+        if args.thumbnail_scale is not None:
+            render_thumbnails(args, sink, certificate_jobs, output_dir, generator_config, metrics)
+    
+    # Afficher les détails, ou le résumé du rapport
+    if report is not None:
+        if not args.quiet:
+            print_summary(report)
+        if args.report is not None:
+            report.write(args.report)
+        if args.report_chart is not None:
+            try:
+                report.write_chart(args.report_chart)
+                print(f"Graphique écrit dans : {args.report_chart}")
+            except ImportError:
+                print("Graphique non tracé : matplotlib n'est pas installé (pip install -r requirements.txt)")
+    elif show_details and not args.pipeline:
+        print("\nDétails des produits avec scores :")
         print("=" * 50)
+        for product in products:
+            print_product_details(product, destination, extension)
     
-    print(f"\nNombre de produits traités : {products_count}")
+    print(f"\nNombre de produits traités : {product_count}")
+    if args.report is not None:
+        print(f"Rapport écrit dans : {args.report}")
+    if form_cache is not None:
+        print(f"Formulaire lu depuis le cache : {'oui' if form_cache.hits else 'non'}")
+    if render_cache is not None:
+        print(f"Rendus évités grâce au cache : {render_cache.renders_saved}")
+    if args.metrics_report is not None:
+        metrics.write_json(args.metrics_report)
+        print(f"Mesures écrites dans : {args.metrics_report}")
+    if args.profile_startup:
+        print_startup_report(metrics)
+
+
+def print_startup_report(metrics: TimingMetrics) -> None:
+    """Affiche le coût du démarrage et les dépendances lourdes chargées."""
+    # Temps CPU du processus avant le début de main.py (interpréteur et modules standard)
+    cpu = os.times()
+    stages = metrics.report()["stages"]
+    print("\nCoût du démarrage :")
+    print(f"  {'imports du programme':<28} {_IMPORT_SECONDS * 1000:>9.1f} ms")
+    for stage, label in (
+        ("read_headers", "lecture des en-têtes du CSV"),
+        ("form_cache", "cache des formulaires"),
+        ("load_assets", "images et polices"),
+    ):
+        if stage in stages:
+            print(f"  {label:<28} {stages[stage]['total_seconds'] * 1000:>9.1f} ms")
+    print(f"  {'temps CPU total':<28} {(cpu.user + cpu.system) * 1000:>9.1f} ms")
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"  Dépendances chargées : {', '.join(loaded) or 'aucune'}")
+    print("  Détail des imports : python -X importtime src/main.py")
+
+
+def main():
+    """Point d'entrée principal."""
+    args = parse_args()
+    if args.profile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(run, args)
+        profiler.dump_stats(str(args.profile))
+        print(f"Profil écrit dans : {args.profile}")
+    else:
+        run(args)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,5 +1,6 @@
+from array import array
 from dataclasses import dataclass, asdict
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import json
 
 @dataclass
@@ -29,8 +30,152 @@ class CsvProduct:
     type: Optional[str]
     product_evaluation: CsvEvaluation
     service_evaluation: CsvEvaluation
-
+    
     def __str__(self) -> str:
         """Format le produit pour l'affichage"""
         product_dict = asdict(self)
         return json.dumps(product_dict, indent=2)
+
+
+class CsvSchema:
+    """Descriptions des colonnes d'un fichier, partagées par tous ses produits.
+    
+    Les descriptions des scores et des composants ne sont stockées qu'une
+    fois. Les réponses sont aussi mises en commun : chaque valeur distincte
+    reçoit un code, et les produits compacts ne gardent que ces codes.
+    Les évaluations sont dans l'ordre produit, service, et les scores dans
+    l'ordre local, eco-friendly, living respect.
+    """
+    
+    # Limite du type "H" des tableaux de réponses
+    MAX_VALUES = 1 << 16
+    
+    def __init__(self, score_descriptions: List[List[str]], component_descriptions: List[List[List[str]]]):
+        """Initialise le schéma.
+        
+        Args:
+            score_descriptions: Descriptions des 3 scores de chaque évaluation
+            component_descriptions: Descriptions des composants de chaque score
+        """
+        self.score_descriptions = score_descriptions
+        self.component_descriptions = component_descriptions
+        self.component_size = len(component_descriptions[0][0])
+        # Le code 0 est réservé aux cellules vides
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+    
+    def encode(self, value: Optional[str]) -> int:
+        """Code d'une réponse, attribué à sa première apparition"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            if code >= self.MAX_VALUES:
+                raise ValueError(f"Trop de réponses distinctes dans le fichier (maximum {self.MAX_VALUES})")
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+    
+    def create_evaluation(self, evaluation_index: int, answers: Sequence[int], labels: List[str]) -> CsvEvaluation:
+        """Vue CsvEvaluation d'une évaluation compacte.
+        
+        Args:
+            evaluation_index: 0 pour l'évaluation produit, 1 pour le service
+            answers: Codes des réponses des 3 scores de l'évaluation
+            labels: Labels de l'évaluation
+        """
+        scores = []
+        size = self.component_size
+        for group, description in enumerate(self.score_descriptions[evaluation_index]):
+            components = [
+                ScoreComponent(description=component_description, value=self.values[code])
+                for component_description, code in zip(
+                    self.component_descriptions[evaluation_index][group],
+                    answers[group * size:(group + 1) * size]
+                )
+            ]
+            scores.append(CsvScore(description=description, score_component=components))
+        return CsvEvaluation(scores=scores, labels=list(labels))
+
+
+class CompactCsvProduct:
+    """Un produit du CSV sous forme compacte.
+    
+    Seules les informations propres à la ligne sont gardées : les réponses
+    sont un tableau de codes (voir CsvSchema), dans l'ordre produit (local,
+    eco, living) puis service. Les descriptions sont lues dans le schéma.
+    product_evaluation, service_evaluation et to_csv_product reconstruisent
+    la vue CsvProduct à la demande.
+    """
+    
+    __slots__ = ("name", "id", "type", "schema", "answers", "product_labels", "service_labels")
+    
+    def __init__(
+        self,
+        name: str,
+        id: Optional[str],
+        type: Optional[str],
+        schema: CsvSchema,
+        answers: array,
+        product_labels: Tuple[str, ...],
+        service_labels: Tuple[str, ...]
+    ):
+        self.name = name
+        self.id = id
+        self.type = type
+        self.schema = schema
+        self.answers = answers
+        self.product_labels = product_labels
+        self.service_labels = service_labels
+    
+    def evaluation_answers(self, evaluation_index: int) -> array:
+        """Codes des réponses d'une évaluation (0 pour le produit, 1 pour le service)"""
+        size = 3 * self.schema.component_size
+        return self.answers[evaluation_index * size:(evaluation_index + 1) * size]
+    
+    @property
+    def product_evaluation(self) -> CsvEvaluation:
+        return self.schema.create_evaluation(0, self.evaluation_answers(0), self.product_labels)
+    
+    @property
+    def service_evaluation(self) -> CsvEvaluation:
+        return self.schema.create_evaluation(1, self.evaluation_answers(1), self.service_labels)
+    
+    def to_csv_product(self) -> CsvProduct:
+        """Vue CsvProduct du produit"""
+        return CsvProduct(
+            name=self.name,
+            id=self.id,
+            type=self.type,
+            product_evaluation=self.product_evaluation,
+            service_evaluation=self.service_evaluation
+        )
+    
+    def _evaluation_dict(self, evaluation_index: int, labels: Tuple[str, ...]) -> Dict:
+        """Évaluation sous forme de dict, comme asdict sur la vue CsvEvaluation"""
+        schema = self.schema
+        size = schema.component_size
+        answers = self.evaluation_answers(evaluation_index)
+        scores = []
+        for group, description in enumerate(schema.score_descriptions[evaluation_index]):
+            scores.append({
+                "description": description,
+                "score_component": [
+                    {"description": component_description, "value": schema.values[code]}
+                    for component_description, code in zip(
+                        schema.component_descriptions[evaluation_index][group],
+                        answers[group * size:(group + 1) * size]
+                    )
+                ]
+            })
+        return {"scores": scores, "labels": list(labels)}
+    
+    def __str__(self) -> str:
+        """Format le produit pour l'affichage, comme CsvProduct"""
+        product_dict = {
+            "name": self.name,
+            "id": self.id,
+            "type": self.type,
+            "product_evaluation": self._evaluation_dict(0, self.product_labels),
+            "service_evaluation": self._evaluation_dict(1, self.service_labels)
+        }
+        return json.dumps(product_dict, indent=2)
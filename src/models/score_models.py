@@ -1,7 +1,10 @@
 from dataclasses import dataclass, asdict
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
 import json
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 @dataclass
 class EvaluationCriterion:
@@ -46,3 +49,29 @@ class ScoreProduct:
         """Format le produit pour l'affichage"""
         product_dict = asdict(self)
         return json.dumps(product_dict, indent=2)
+
+
+@dataclass
+class ScoreTable:
+    """Scores de tous les produits d'un fichier, calculés en une passe.
+    
+    Les critères sont dans l'ordre local, eco-friendly, living respect, et
+    les évaluations dans l'ordre produit, service.
+    """
+    yes_counts: "np.ndarray"    # (produits, 2, 3) nombre de réponses "Yes" par évaluation et critère
+    values_found: "np.ndarray"  # (produits, 2) au moins une réponse par évaluation
+    total_questions: int
+
+    def __len__(self) -> int:
+        return len(self.yes_counts)
+
+    @property
+    def uses_product_evaluation(self) -> "np.ndarray":
+        """Vrai pour les lignes dont le certificat utilise l'évaluation produit"""
+        return self.values_found[:, 0]
+
+    @property
+    def selected_yes_counts(self) -> "np.ndarray":
+        """(produits, 3) nombre de réponses "Yes" de l'évaluation retenue pour le certificat"""
+        import numpy as np
+        return np.where(self.uses_product_evaluation[:, None], self.yes_counts[:, 0], self.yes_counts[:, 1])
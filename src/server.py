@@ -0,0 +1,236 @@
+"""Service HTTP local de génération de certificats à la demande.
+
+Routes :
+    POST /certificate       Réponses d'un produit en JSON -> certificat
+    POST /certificates      Formulaire CSV -> certificat (un produit) ou archive ZIP
+    GET  /metrics           Latences, débit, lots et cache en JSON
+    GET  /health            Vérification que le service répond
+
+Exemple :
+    python src/server.py --port 8080
+    curl -X POST localhost:8080/certificate -d @produit.json -o certificat.png
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+# Ajouter le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.main import create_generator_config
+from src.services.certificate_encoder import CertificateEncoder
+from src.services.render_service import RenderService, ServiceOverloaded
+
+# Taille maximale du corps d'une requête
+MAX_BODY_BYTES = 16 << 20
+
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "jpg": "image/jpeg", "zip": "application/zip"}
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"
+}
+
+
+class HttpError(Exception):
+    """Erreur renvoyée au client avec son code HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CertificateServer:
+    """Serveur HTTP/1.1 minimal (asyncio) devant un RenderService"""
+
+    def __init__(self, service: RenderService):
+        self.service = service
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Traite les requêtes d'une connexion (keep-alive) jusqu'à sa fermeture"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                start = time.perf_counter()
+                try:
+                    status, content_type, payload, extra_headers = await self.dispatch(method, path, headers, body)
+                except HttpError as error:
+                    status, content_type, extra_headers = error.status, "application/json", {}
+                    payload = json.dumps({"error": str(error)}, ensure_ascii=False).encode("utf-8")
+                if path.startswith("/certificate"):
+                    self.service.stats.record(time.perf_counter() - start, error=status >= 400)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, content_type, payload, extra_headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as error:
+            # Requête illisible : répondre puis fermer la connexion
+            payload = json.dumps({"error": str(error)}, ensure_ascii=False).encode("utf-8")
+            self._write_response(writer, error.status, "application/json", payload, {}, keep_alive=False)
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self,
+        reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Lit une requête : méthode, chemin, en-têtes (en minuscules) et corps"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise HttpError(400, "Ligne de requête invalide")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "Content-Length invalide")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"Corps de requête limité à {MAX_BODY_BYTES} octets")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        content_type: str,
+        payload: bytes,
+        extra_headers: Dict[str, str],
+        keep_alive: bool
+    ) -> None:
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(payload)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **extra_headers
+        }
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + payload)
+
+    async def dispatch(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: bytes
+    ) -> Tuple[int, str, bytes, Dict[str, str]]:
+        """Exécute une requête et retourne code, type de contenu, corps et en-têtes"""
+        routes = {
+            "/certificate": ("POST", self.certificate),
+            "/certificates": ("POST", self.certificates),
+            "/metrics": ("GET", self.metrics),
+            "/health": ("GET", self.health),
+        }
+        if path not in routes:
+            raise HttpError(404, f"Route inconnue : {path}")
+        expected_method, handler = routes[path]
+        if method != expected_method:
+            raise HttpError(405, f"{path} attend la méthode {expected_method}")
+        try:
+            return await handler(body)
+        except ValueError as error:
+            raise HttpError(400, str(error))
+        except ServiceOverloaded as error:
+            raise HttpError(503, str(error))
+        except HttpError:
+            raise
+        except Exception as error:
+            raise HttpError(500, f"Erreur interne : {error}")
+
+    def _file_response(self, filename: str, data: bytes) -> Tuple[int, str, bytes, Dict[str, str]]:
+        content_type = CONTENT_TYPES.get(filename.rsplit(".", 1)[-1], "application/octet-stream")
+        ascii_name = filename.encode("ascii", "replace").decode("ascii").replace('"', "_")
+        return 200, content_type, data, {"Content-Disposition": f'attachment; filename="{ascii_name}"'}
+
+    async def certificate(self, body: bytes):
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(400, "Corps JSON invalide")
+        filename, data = await self.service.render_json(payload)
+        return self._file_response(filename, data)
+
+    async def certificates(self, body: bytes):
+        certificates = await self.service.render_csv(body)
+        if len(certificates) == 1:
+            return self._file_response(*certificates[0])
+        return self._file_response("certificates.zip", self.service.zip_certificates(certificates))
+
+    async def metrics(self, body: bytes):
+        return 200, "application/json", json.dumps(self.service.metrics(), indent=2).encode("utf-8"), {}
+
+    async def health(self, body: bytes):
+        return 200, "application/json", b'{"status": "ok"}', {}
+
+
+async def serve(args) -> None:
+    """Démarre le service et le serveur HTTP jusqu'à l'interruption"""
+    service = RenderService(
+        create_generator_config(CertificateEncoder(compress_level=args.png_compress_level), args.asset_cache_dir),
+        schema_csv=args.schema_csv,
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_batch_delay=args.max_batch_delay_ms / 1000,
+        cache_entries=args.cache_entries,
+        max_queue=args.max_queue
+    )
+    await service.start()
+    server = await asyncio.start_server(CertificateServer(service).handle_connection, args.host, args.port)
+    print(f"Service de certificats sur http://{args.host}:{args.port} ({service.workers} processus)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    arg_parser = argparse.ArgumentParser(description="Service HTTP local de génération de certificats")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (locale par défaut)")
+    arg_parser.add_argument("--port", type=int, default=8080, help="Port d'écoute")
+    arg_parser.add_argument("--workers", type=int, default=0, help="Processus de génération (0 = un par cœur)")
+    arg_parser.add_argument("--max-batch-size", type=int, default=8, help="Nombre maximal de certificats par lot")
+    arg_parser.add_argument("--max-batch-delay-ms", type=float, default=5.0,
+                            help="Attente maximale pour compléter un lot, en millisecondes")
+    arg_parser.add_argument("--cache-entries", type=int, default=1024, help="Certificats gardés en mémoire")
+    arg_parser.add_argument("--max-queue", type=int, default=1024,
+                            help="Certificats en attente au-delà desquels les requêtes sont refusées (503)")
+    arg_parser.add_argument("--schema-csv", type=Path, default=Path("input/product and service form - small.csv"),
+                            help="Formulaire dont les en-têtes donnent les descriptions des critères")
+    arg_parser.add_argument("--png-compress-level", type=int, choices=range(10), default=None,
+                            help="Niveau de compression PNG (0 = rapide, 9 = compact)")
+    arg_parser.add_argument("--asset-cache-dir", type=Path, default=None,
+                            help="Dossier du cache des images décodées")
+    args = arg_parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\nService arrêté")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from src.services.certificate_generator import scaled_size
+from src.services.file_digest import file_digest
+
+CACHE_VERSION = 1
+
+# En-tête des fichiers du cache : signature, largeur et hauteur de l'image RGBA
+HEADER = struct.Struct("<4sII")
+MAGIC = b"ECA1"
+
+
+class AssetCache:
+    """Cache sur disque des images déjà décodées (template et feuilles).
+
+    Chaque image est enregistrée une fois convertie en RGBA et
+    redimensionnée, sous forme de pixels bruts, dans un fichier nommé
+    d'après l'empreinte du fichier source et de la taille demandée. Les
+    générateurs projettent ensuite ce fichier en mémoire (mmap) au lieu de
+    décoder le PNG : les pages sont partagées entre tous les processus qui
+    utilisent la même image. Les images obtenues sont en lecture seule (les
+    copier avant de dessiner dessus, comme le fait CertificateGenerator).
+    """
+
+    def __init__(self, directory: Path):
+        """Initialise le cache.
+
+        Args:
+            directory: Dossier du cache, créé s'il n'existe pas
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Statistiques de l'exécution
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        source: Path,
+        width: Optional[int] = None,
+        size: Optional[Tuple[int, int]] = None,
+        scale: Optional[float] = None
+    ) -> str:
+        """Clé d'une image : empreinte du fichier source et du redimensionnement demandé"""
+        payload = f"{CACHE_VERSION}:{file_digest(source)}:{width}:{size}:{scale}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load(
+        self,
+        source: Path,
+        width: Optional[int] = None,
+        size: Optional[Tuple[int, int]] = None,
+        scale: Optional[float] = None
+    ) -> Image.Image:
+        """Retourne l'image RGBA, décodée une seule fois puis projetée en mémoire.
+
+        Args:
+            source: Fichier image d'origine
+            width: Largeur voulue, la hauteur gardant le ratio de l'image (optionnel)
+            size: Taille exacte voulue, prioritaire sur width (optionnel)
+            scale: Facteur d'échelle, utilisé si ni size ni width ne sont donnés (optionnel)
+        """
+        if scale == 1:
+            scale = None
+        path = self.directory / f"{self.key(source, width, size, scale)}.rgba"
+        image = self._map(path)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = Image.open(source).convert('RGBA')
+        if size is None and width is not None:
+            size = (width, int(width * (image.height / image.width)))
+        elif size is None and scale is not None:
+            size = scaled_size(image.size, scale)
+        if size is not None:
+            image = image.resize(size)
+        self._store(path, image)
+        return self._map(path) or image
+
+    @staticmethod
+    def _map(path: Path) -> Optional[Image.Image]:
+        """Projette un fichier du cache en mémoire, None s'il n'existe pas ou est invalide"""
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(mapping) < HEADER.size:
+            return None
+        magic, width, height = HEADER.unpack_from(mapping)
+        if magic != MAGIC or len(mapping) != HEADER.size + width * height * 4:
+            return None
+        # L'image garde une référence au mapping, qui reste ouvert tant qu'elle existe
+        return Image.frombuffer("RGBA", (width, height), memoryview(mapping)[HEADER.size:], "raw", "RGBA", 0, 1)
+
+    @staticmethod
+    def _store(path: Path, image: Image.Image) -> None:
+        """Écrit les pixels bruts d'une image, de façon atomique"""
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, image.width, image.height))
+            f.write(image.tobytes())
+        os.replace(tmp_path, path)
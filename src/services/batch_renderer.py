@@ -0,0 +1,268 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.models.score_models import Evaluation, ScoreProduct
+from src.services.certificate_generator import CertificateGenerator
+from src.services.certificate_sink import CertificateSink
+from src.services.metrics import Metrics
+from src.services.render_cache import RenderCache
+
+
+@dataclass
+class CertificateJob:
+    """Un certificat à générer.
+
+    Args:
+        score: Évaluation à représenter sur le certificat
+        filename: Nom du fichier du certificat dans la destination
+    """
+    score: Evaluation
+    filename: str
+
+
+def certificate_filename(name: str, extension: str = "png") -> str:
+    """Nom du fichier de certificat pour un produit"""
+    return name.lower().replace(" ", "_") + "_certificate." + extension
+
+
+def select_evaluation(product: ScoreProduct) -> Evaluation:
+    """Choisit l'évaluation produit si elle contient des réponses, sinon l'évaluation service"""
+    return (product.product_evaluation if product.product_evaluation.values_found
+            else product.service_evaluation)
+
+
+def deduplicate_jobs(certificate_jobs: Sequence[CertificateJob]) -> List[CertificateJob]:
+    """Garde le dernier job pour chaque fichier de sortie, dans l'ordre d'origine"""
+    last_index = {job.filename: i for i, job in enumerate(certificate_jobs)}
+    return [job for i, job in enumerate(certificate_jobs) if last_index[job.filename] == i]
+
+
+# Générateur propre à chaque processus worker, créé une seule fois par init_worker
+_worker_generator: Optional[CertificateGenerator] = None
+
+
+def init_worker(generator_config: Dict[str, Any]) -> None:
+    """Initialiseur d'un processus worker : charge le template, les feuilles et les polices une fois"""
+    global _worker_generator
+    _worker_generator = CertificateGenerator(**generator_config)
+    _worker_generator.load_assets()
+
+
+def render_chunk(
+    chunk: List[CertificateJob],
+    sink: Optional[CertificateSink],
+    return_bytes: bool
+) -> List[Optional[bytes]]:
+    """Génère un lot de certificats dans un worker préparé par init_worker.
+
+    Args:
+        chunk: Certificats à générer
+        sink: Destination partagée où écrire directement, ou None pour
+            renvoyer les octets au processus principal
+        return_bytes: Renvoyer les octets même s'ils ont été écrits
+    """
+    results = []
+    for job in chunk:
+        data = _worker_generator.certificate_bytes(job.score)
+        if sink is not None:
+            sink.write(job.filename, data)
+        results.append(data if return_bytes or sink is None else None)
+    return results
+
+
+class BatchRenderer:
+    """Génère une série de certificats, en série ou avec un pool de processus.
+
+    Chaque worker construit son propre CertificateGenerator à partir de la
+    configuration (les images et polices ne sont donc chargées qu'une fois par
+    processus), puis reçoit les certificats par lots. Les workers écrivent
+    directement dans une destination partagée (dossier) ; pour une archive,
+    ils renvoient les octets et le processus principal les écrit dans l'ordre.
+
+    Avec un RenderCache, chaque certificat visuellement distinct n'est généré
+    qu'une fois : les doublons sont écrits depuis le cache.
+
+    Les mesures (metrics) détaillent chaque étape du dessin en mode série ; avec
+    un pool de processus, seule l'écriture dans la destination est mesurée.
+    """
+
+    def __init__(
+        self,
+        generator_config: Dict[str, Any],
+        sink: CertificateSink,
+        jobs: int = 1,
+        chunk_size: Optional[int] = None,
+        render_cache: Optional[RenderCache] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        """Initialise le renderer.
+
+        Args:
+            generator_config: Arguments du constructeur de CertificateGenerator
+            sink: Destination des certificats encodés
+            jobs: Nombre de processus (1 = en série, 0 = un par cœur)
+            chunk_size: Nombre de certificats envoyés à la fois à un worker
+                (calculé automatiquement si None)
+            render_cache: Cache des certificats déjà générés (optionnel)
+            metrics: Mesures des étapes (aucune par défaut)
+        """
+        self.generator_config = generator_config
+        self.sink = sink
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.render_cache = render_cache
+        self.metrics = metrics or Metrics()
+        self._generator: Optional[CertificateGenerator] = None
+        self._executor = None
+
+    @property
+    def generator(self) -> CertificateGenerator:
+        """Générateur du processus courant, utilisé en mode série"""
+        if self._generator is None:
+            self._generator = CertificateGenerator(**self.generator_config)
+            self._generator.metrics = self.metrics
+        return self._generator
+
+    def render(
+        self,
+        certificate_jobs: Sequence[CertificateJob],
+        on_written: Optional[Callable[[CertificateJob], None]] = None
+    ) -> List[str]:
+        """Génère tous les certificats et retourne leurs noms de fichiers dans l'ordre des jobs.
+
+        Si plusieurs jobs visent le même fichier, seul le dernier est généré,
+        comme en mode série où il écraserait les précédents.
+
+        Args:
+            certificate_jobs: Certificats à générer
+            on_written: Appelée pour chaque job dès que son fichier est écrit (optionnel)
+        """
+        on_written = on_written or (lambda job: None)
+        certificate_jobs = deduplicate_jobs(certificate_jobs)
+        if self.render_cache is None:
+            for job, _ in self._render_jobs(certificate_jobs, keep_bytes=False):
+                on_written(job)
+        else:
+            self._render_cached(certificate_jobs, self.render_cache, on_written)
+        return [job.filename for job in certificate_jobs]
+
+    def _render_cached(
+        self,
+        certificate_jobs: List[CertificateJob],
+        render_cache: RenderCache,
+        on_written: Callable[[CertificateJob], None]
+    ) -> None:
+        """Génère une seule fois chaque certificat distinct et écrit les autres depuis le cache"""
+        unique_jobs: Dict[str, CertificateJob] = {}
+        duplicates: Dict[str, List[CertificateJob]] = {}
+        for job in certificate_jobs:
+            key = render_cache.key(job.score)
+            if key in unique_jobs:
+                duplicates.setdefault(key, []).append(job)
+            elif render_cache.write(key, self.sink, job.filename):
+                on_written(job)
+            else:
+                unique_jobs[key] = job
+
+        keys = list(unique_jobs)
+        for key, (job, data) in zip(keys, self._render_jobs(list(unique_jobs.values()), keep_bytes=True)):
+            render_cache.put(key, data)
+            render_cache.mark_written(key, job.filename)
+            on_written(job)
+            # Écrire les doublons tant que les octets sont disponibles : le LRU a pu les retirer ensuite
+            for duplicate in duplicates.pop(key, []):
+                if render_cache.write(key, self.sink, duplicate.filename, data):
+                    on_written(duplicate)
+
+    def _render_jobs(
+        self,
+        certificate_jobs: List[CertificateJob],
+        keep_bytes: bool
+    ) -> Iterator[Tuple[CertificateJob, Optional[bytes]]]:
+        """Génère et écrit chaque certificat, en série ou dans le pool de processus.
+
+        Args:
+            certificate_jobs: Certificats à générer
+            keep_bytes: Produire les octets de chaque certificat (sinon None)
+
+        Yields:
+            Chaque job avec ses octets, dans l'ordre des jobs, une fois écrit
+        """
+        if self.jobs == 1 or len(certificate_jobs) <= 1:
+            for job in certificate_jobs:
+                with self.metrics.span("certificate", item=job.filename):
+                    data = self.generator.certificate_bytes(job.score)
+                    with self.metrics.span("write"):
+                        self.sink.write(job.filename, data)
+                yield job, data if keep_bytes else None
+            return
+
+        chunk_size = self.chunk_size or max(1, -(-len(certificate_jobs) // (self.jobs * 4)))
+        chunks = [
+            certificate_jobs[i:i + chunk_size]
+            for i in range(0, len(certificate_jobs), chunk_size)
+        ]
+
+        worker_sink = self.sink if self.sink.shared else None
+        if self._executor is not None:
+            # Pool gardé entre les appels (start_pool) : les workers sont déjà prêts
+            yield from self._collect(self._executor, chunks, worker_sink, keep_bytes)
+            return
+        with self._create_pool(min(self.jobs, len(chunks))) as executor:
+            yield from self._collect(executor, chunks, worker_sink, keep_bytes)
+
+    def _create_pool(self, workers: int):
+        """Crée le pool de processus, chaque worker chargeant son propre générateur"""
+        # Importé seulement en mode parallèle, pour un démarrage plus rapide en série
+        from concurrent.futures import ProcessPoolExecutor
+        if self.generator_config.get("asset_cache_dir") is not None:
+            # Préparer le cache des images une fois, avant que les workers ne le projettent
+            self.generator.load_assets()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(self.generator_config,)
+        )
+
+    def _collect(
+        self,
+        executor,
+        chunks: List[List[CertificateJob]],
+        worker_sink: Optional[CertificateSink],
+        keep_bytes: bool
+    ) -> Iterator[Tuple[CertificateJob, Optional[bytes]]]:
+        """Envoie les lots au pool et produit les jobs dans leur ordre, une fois écrits"""
+        # map conserve l'ordre des lots
+        results = executor.map(
+            render_chunk, chunks, [worker_sink] * len(chunks), [keep_bytes] * len(chunks)
+        )
+        for chunk, chunk_results in zip(chunks, results):
+            for job, data in zip(chunk, chunk_results):
+                if worker_sink is None:
+                    with self.metrics.span("write", item=job.filename):
+                        self.sink.write(job.filename, data)
+                yield job, data if keep_bytes else None
+
+    def start_pool(self) -> None:
+        """Démarre les workers une fois pour tous les render() suivants, jusqu'à close().
+
+        Sans start_pool, chaque appel à render() crée puis arrête son propre
+        pool, et chaque worker recharge les images et polices. La destination
+        (sink) peut changer entre deux appels.
+        """
+        if self.jobs > 1 and self._executor is None:
+            self._executor = self._create_pool(self.jobs)
+
+    def close(self) -> None:
+        """Arrête le pool démarré par start_pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        self.start_pool()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,68 @@
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+# Extension des fichiers pour chaque format supporté
+FORMAT_EXTENSIONS = {
+    "PNG": "png",
+    "WEBP": "webp",
+    "JPEG": "jpg",
+}
+
+
+@dataclass(frozen=True)
+class CertificateEncoder:
+    """Encodage des certificats générés.
+
+    Args:
+        format: Format de l'image (PNG, WEBP ou JPEG)
+        compress_level: Niveau de compression PNG de 0 (rapide) à 9 (compact),
+            None pour la valeur par défaut de Pillow
+        quality: Qualité WEBP/JPEG de 1 à 100, None pour la valeur par défaut
+        transparency: Garder le canal alpha ; sinon l'image est aplatie sur un
+            fond blanc et encodée en RGB (toujours le cas en JPEG)
+    """
+    format: str = "PNG"
+    compress_level: Optional[int] = None
+    quality: Optional[int] = None
+    transparency: bool = True
+
+    def __post_init__(self):
+        if self.format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Format de certificat non supporté : {self.format}")
+
+    @property
+    def extension(self) -> str:
+        """Extension des fichiers produits"""
+        return FORMAT_EXTENSIONS[self.format]
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """Convertit l'image dans le mode attendu par l'encodage"""
+        if self.transparency and self.format != "JPEG":
+            return image
+        if image.mode != "RGBA":
+            return image.convert("RGB")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    def encode(self, image: Image.Image) -> bytes:
+        """Encode un certificat.
+
+        Args:
+            image: Certificat dessiné par CertificateGenerator.render_certificate
+
+        Returns:
+            Octets du fichier encodé
+        """
+        params = {}
+        if self.format == "PNG" and self.compress_level is not None:
+            params["compress_level"] = self.compress_level
+        if self.format in ("WEBP", "JPEG") and self.quality is not None:
+            params["quality"] = self.quality
+
+        buffer = io.BytesIO()
+        self.prepare(image).save(buffer, self.format, **params)
+        return buffer.getvalue()
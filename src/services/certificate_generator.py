@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 
 from src.models.score_models import Evaluation
+from src.services.certificate_encoder import CertificateEncoder
+from src.services.metrics import Metrics
 
 
 @dataclass
@@ -17,6 +19,15 @@ class ElementPosition:
     """
     x: int
     y: int
+    
+    def scaled(self, factor: float) -> "ElementPosition":
+        """Position sur un certificat mis à l'échelle"""
+        return ElementPosition(x=round(self.x * factor), y=round(self.y * factor))
+
+
+def scaled_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """Taille d'une image mise à l'échelle (au moins 1 pixel de côté)"""
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
 
 
 class CertificateGenerator:
@@ -24,6 +35,15 @@ class CertificateGenerator:
     
     Cette classe génère une image de certificat pour chaque produit,
     en affichant les scores sous forme de feuilles (actives/inactives).
+    
+    Les images et polices ne sont chargées qu'au premier certificat (ou par
+    load_assets) : créer un générateur ne coûte presque rien.
+    
+    Les positions, tailles et polices sont données pour la résolution du
+    template. Avec un facteur d'échelle (scale), le template, les feuilles,
+    les polices et les positions sont mis à l'échelle une fois au chargement,
+    puis chaque certificat est dessiné directement à cette taille (brouillons,
+    miniatures).
     """
     
     def __init__(
@@ -43,9 +63,13 @@ class CertificateGenerator:
         font_path: Path,
         bold_font_path: Path,
         font_size: int,
-        description_font_size: int
+        description_font_size: int,
+        total_questions: Optional[int] = None,
+        encoder: Optional[CertificateEncoder] = None,
+        asset_cache_dir: Optional[Path] = None,
+        scale: float = 1.0
     ):
-        """Initialise le générateur avec les images et positions.
+        """Initialise le générateur avec les chemins des images et les positions.
         
         Args:
             certificate_template: Image du certificat vierge
@@ -64,48 +88,203 @@ class CertificateGenerator:
             bold_font_path: Chemin vers la police en gras à utiliser
             font_size: Taille de la police pour les labels
             description_font_size: Taille de la police pour les descriptions
+            total_questions: Nombre de questions par critère, pour pré-calculer
+                les bandes de feuilles au chargement des images (optionnel)
+            encoder: Encodage des certificats (PNG par défaut)
+            asset_cache_dir: Dossier du cache des images décodées (voir
+                AssetCache), partagé entre processus (optionnel)
+            scale: Facteur d'échelle du certificat (1.0 = taille du template)
         """
-        # Charger les images
-        self.template = Image.open(certificate_template).convert('RGBA')
-        
-        # Charger les feuilles
-        active = Image.open(active_leaf).convert('RGBA')
-        inactive = Image.open(inactive_leaf).convert('RGBA')
+        if scale <= 0:
+            raise ValueError(f"Le facteur d'échelle doit être positif : {scale}")
+        self.scale = scale
         
-        # Calculer la hauteur pour garder le ratio
-        ratio = active.height / active.width
-        leaf_height = int(leaf_width * ratio)
-        
-        # Redimensionner les feuilles en gardant le ratio
-        self.active_leaf = active.resize((leaf_width, leaf_height))
-        self.inactive_leaf = inactive.resize((leaf_width, leaf_height))
+        # Images et polices, chargées par load_assets
+        self.certificate_template_path = certificate_template
+        self.active_leaf_path = active_leaf
+        self.inactive_leaf_path = inactive_leaf
+        self.leaf_width = max(1, round(leaf_width * scale))
+        self.font_path = font_path
+        self.bold_font_path = bold_font_path
+        self.font_size = max(1, round(font_size * scale))
+        self.description_font_size = max(1, round(description_font_size * scale))
+        self.total_questions = total_questions
+        self.asset_cache_dir = asset_cache_dir
+        self._assets_loaded = False
         
         # Positions des scores
-        self.local_position = local_position
-        self.eco_position = eco_position
-        self.living_position = living_position
+        self.local_position = local_position.scaled(scale)
+        self.eco_position = eco_position.scaled(scale)
+        self.living_position = living_position.scaled(scale)
         
         # Positions des descriptions
-        self.local_description_position = local_description_position
-        self.eco_description_position = eco_description_position
-        self.living_description_position = living_description_position
+        self.local_description_position = local_description_position.scaled(scale)
+        self.eco_description_position = eco_description_position.scaled(scale)
+        self.living_description_position = living_description_position.scaled(scale)
         
         # Espacement entre les feuilles
-        self.leaf_spacing = leaf_spacing
+        self.leaf_spacing = round(leaf_spacing * scale)
         
         # Configuration des labels
-        self.label_position = label_position
-        self.font = ImageFont.truetype(str(font_path), font_size)
-        self.description_font = ImageFont.truetype(str(bold_font_path), description_font_size)
+        self.label_position = label_position.scaled(scale)
+        
+        # Encodage des certificats
+        self.encoder = encoder or CertificateEncoder()
+        
+        # Mesures des étapes (aucune par défaut), à remplacer par un objet Metrics
+        self.metrics = Metrics()
+        
+        # Masques pré-rendus des descriptions et leur position, un par jeu de descriptions
+        self._description_layers: Dict[Tuple[str, str, str], Tuple[Tuple[int, int], Optional[Image.Image]]] = {}
+        
+        # Bandes de feuilles pré-composées et leur masque, par (yes_count, total_questions)
+        self._leaf_strips: Dict[Tuple[int, int], Tuple[Image.Image, Image.Image]] = {}
+        self.strip_cache_hits = 0
+        self.strip_cache_misses = 0
     
-    def generate_certificate(self, score: Evaluation, output_path: Path) -> None:
-        """Génère le certificat pour un score.
+    def load_assets(self) -> None:
+        """Charge le template, les feuilles et les polices, une seule fois.
+        
+        Appelé automatiquement au premier accès à une image ou une police.
+        """
+        if self._assets_loaded:
+            return
+        with self.metrics.span("load_assets"):
+            if self.asset_cache_dir is not None:
+                # Images déjà décodées et redimensionnées, projetées en mémoire
+                from src.services.asset_cache import AssetCache
+                asset_cache = AssetCache(self.asset_cache_dir)
+                self._template = asset_cache.load(self.certificate_template_path, scale=self.scale)
+                self._active_leaf = asset_cache.load(self.active_leaf_path, width=self.leaf_width)
+                self._inactive_leaf = asset_cache.load(self.inactive_leaf_path, size=self._active_leaf.size)
+            else:
+                # Charger les images
+                self._template = Image.open(self.certificate_template_path).convert('RGBA')
+                if self.scale != 1:
+                    self._template = self._template.resize(scaled_size(self._template.size, self.scale))
+                
+                # Charger les feuilles
+                active = Image.open(self.active_leaf_path).convert('RGBA')
+                inactive = Image.open(self.inactive_leaf_path).convert('RGBA')
+                
+                # Calculer la hauteur pour garder le ratio
+                ratio = active.height / active.width
+                leaf_height = int(self.leaf_width * ratio)
+                
+                # Redimensionner les feuilles en gardant le ratio
+                self._active_leaf = active.resize((self.leaf_width, leaf_height))
+                self._inactive_leaf = inactive.resize((self.leaf_width, leaf_height))
+            
+            # Polices des labels et des descriptions
+            self._font = ImageFont.truetype(str(self.font_path), self.font_size)
+            self._description_font = ImageFont.truetype(str(self.bold_font_path), self.description_font_size)
+            self._assets_loaded = True
+            
+            if self.total_questions is not None:
+                self.precompute_leaf_strips(self.total_questions)
+    
+    @property
+    def template(self) -> Image.Image:
+        self.load_assets()
+        return self._template
+    
+    @property
+    def active_leaf(self) -> Image.Image:
+        self.load_assets()
+        return self._active_leaf
+    
+    @property
+    def inactive_leaf(self) -> Image.Image:
+        self.load_assets()
+        return self._inactive_leaf
+    
+    @property
+    def font(self) -> ImageFont.FreeTypeFont:
+        self.load_assets()
+        return self._font
+    
+    @property
+    def description_font(self) -> ImageFont.FreeTypeFont:
+        self.load_assets()
+        return self._description_font
+    
+    def precompute_leaf_strips(self, total_questions: int) -> None:
+        """Pré-calcule les bandes de feuilles pour tous les scores possibles.
+        
+        Args:
+            total_questions: Nombre de questions du critère
+        """
+        for yes_count in range(total_questions + 1):
+            key = (yes_count, total_questions)
+            if key not in self._leaf_strips:
+                self._leaf_strips[key] = self._build_leaf_strip(yes_count, total_questions)
+    
+    def strip_cache_info(self) -> Dict[str, int]:
+        """Statistiques du cache de bandes de feuilles"""
+        return {
+            "hits": self.strip_cache_hits,
+            "misses": self.strip_cache_misses,
+            "size": len(self._leaf_strips)
+        }
+    
+    def _build_leaf_strip(self, yes_count: int, total_questions: int) -> Tuple[Image.Image, Image.Image]:
+        """Compose la bande de feuilles d'un score et son masque alpha.
+        
+        Les feuilles sont copiées telles quelles sur un fond transparent : le
+        collage de la bande avec son masque donne donc le même résultat que le
+        collage feuille par feuille (tant que les feuilles ne se chevauchent pas).
+        """
+        leaf_width, leaf_height = self.active_leaf.size
+        width = max(0, total_questions - 1) * self.leaf_spacing + leaf_width
+        strip = Image.new('RGBA', (width, leaf_height), (0, 0, 0, 0))
+        for i in range(total_questions):
+            leaf = self.active_leaf if i < yes_count else self.inactive_leaf
+            strip.paste(leaf, (i * self.leaf_spacing, 0))
+        return strip, strip.getchannel('A')
+    
+    def get_description_layer(self, score: Evaluation) -> Tuple[Tuple[int, int], Optional[Image.Image]]:
+        """Retourne le masque des descriptions, déjà dessinées, et sa position.
+        
+        Les descriptions viennent des en-têtes du CSV et sont donc identiques
+        pour tous les produits d'un même fichier : leur masque n'est dessiné
+        qu'une fois par jeu de descriptions. Il est collé après les feuilles,
+        que les descriptions sur plusieurs lignes peuvent recouvrir.
+        
+        Args:
+            score: Score dont les descriptions doivent figurer sur le certificat
+        
+        Returns:
+            Coin supérieur gauche et masque des descriptions (None si elles sont vides)
+        """
+        key = (
+            score.local_evaluation.description,
+            score.ecofriendly_evaluation.description,
+            score.living_respect_evaluation.description
+        )
+        layer = self._description_layers.get(key)
+        if layer is None:
+            mask = Image.new('L', self.template.size, 0)
+            draw = ImageDraw.Draw(mask)
+            for position, description in zip(
+                (self.local_description_position, self.eco_description_position, self.living_description_position),
+                key
+            ):
+                draw.text((position.x, position.y), description, font=self.description_font, fill=255)
+            # Ne garder que la zone du texte
+            bbox = mask.getbbox()
+            layer = ((bbox[0], bbox[1]), mask.crop(bbox)) if bbox else ((0, 0), None)
+            self._description_layers[key] = layer
+        return layer
+    
+    def render_certificate(self, score: Evaluation) -> Image.Image:
+        """Dessine le certificat d'un score, sans l'enregistrer.
         
         Args:
             score: Score à représenter sur le certificat
-            output_path: Chemin où sauvegarder l'image générée
+        
+        Returns:
+            Image du certificat
         """
-        # Créer une copie de l'image template
         certificate = self.template.copy()
         
         # Dessiner les scores
@@ -113,39 +292,48 @@ class CertificateGenerator:
         self._draw_score(certificate, score.ecofriendly_evaluation, self.eco_position)
         self._draw_score(certificate, score.living_respect_evaluation, self.living_position)
         
-        # Dessiner les descriptions
-        draw = ImageDraw.Draw(certificate)
-        draw.text(
-            (self.local_description_position.x, self.local_description_position.y),
-            score.local_evaluation.description,
-            font=self.description_font,
-            fill=(0, 0, 0)
-        )
-        draw.text(
-            (self.eco_description_position.x, self.eco_description_position.y),
-            score.ecofriendly_evaluation.description,
-            font=self.description_font,
-            fill=(0, 0, 0)
-        )
-        draw.text(
-            (self.living_description_position.x, self.living_description_position.y),
-            score.living_respect_evaluation.description,
-            font=self.description_font,
-            fill=(0, 0, 0)
-        )
+        # Dessiner les descriptions par-dessus les feuilles, en noir à travers leur masque
+        with self.metrics.span("descriptions"):
+            position, mask = self.get_description_layer(score)
+            if mask is not None:
+                certificate.paste((0, 0, 0), position + (position[0] + mask.width, position[1] + mask.height), mask)
         
         # Dessiner les labels s'il y en a
         if score.labels:
-            labels_text = ", ".join(score.labels)
-            draw.text(
-                (self.label_position.x, self.label_position.y),
-                labels_text,
-                font=self.font,
-                fill=(0, 0, 0)  # Noir
-            )
+            with self.metrics.span("draw_text"):
+                draw = ImageDraw.Draw(certificate)
+                labels_text = ", ".join(score.labels)
+                draw.text(
+                    (self.label_position.x, self.label_position.y),
+                    labels_text,
+                    font=self.font,
+                    fill=(0, 0, 0)  # Noir
+                )
+        
+        return certificate
+    
+    def certificate_bytes(self, score: Evaluation) -> bytes:
+        """Génère le certificat d'un score et retourne le fichier encodé.
+        
+        Args:
+            score: Score à représenter sur le certificat
+        """
+        certificate = self.render_certificate(score)
+        with self.metrics.span("encode"):
+            return self.encoder.encode(certificate)
+    
+    def generate_certificate(self, score: Evaluation, output_path: Path) -> None:
+        """Génère le certificat pour un score.
+        
+        Args:
+            score: Score à représenter sur le certificat
+            output_path: Chemin où sauvegarder l'image générée
+        """
+        data = self.certificate_bytes(score)
         
         # Sauvegarder l'image
-        certificate.save(output_path, 'PNG')
+        with self.metrics.span("save"):
+            output_path.write_bytes(data)
     
     def _draw_score(self, certificate: Image, score: 'ComponentScore', position: ElementPosition) -> None:
         """Dessine un score sous forme de feuilles.
@@ -155,16 +343,16 @@ class CertificateGenerator:
             score: Score à représenter
             position: Position où dessiner les feuilles
         """
-        # Pour chaque feuille possible
-        for i in range(score.total_questions):
-            # Calculer la position x de cette feuille
-            x = position.x + (i * self.leaf_spacing)
-            
-            # Choisir l'image de feuille selon le score
-            leaf = self.active_leaf if i < score.yes_count else self.inactive_leaf
-            
-            # Créer un masque à partir du canal alpha
-            mask = leaf.split()[3] if len(leaf.split()) == 4 else None
+        with self.metrics.span("draw_score"):
+            key = (score.yes_count, score.total_questions)
+            cached = self._leaf_strips.get(key)
+            if cached is None:
+                self.strip_cache_misses += 1
+                cached = self._build_leaf_strip(score.yes_count, score.total_questions)
+                self._leaf_strips[key] = cached
+            else:
+                self.strip_cache_hits += 1
             
-            # Coller la feuille sur le certificat
-            certificate.paste(leaf, (x, position.y), mask)
+            # Coller la bande de feuilles en une seule fois
+            strip, mask = cached
+            certificate.paste(strip, (position.x, position.y), mask)
@@ -0,0 +1,188 @@
+import io
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from PIL import Image
+
+
+class CertificateSink(ABC):
+    """Destination des certificats encodés.
+
+    Une destination reçoit les octets de chaque certificat avec son nom de
+    fichier. Les destinations partagées (shared) peuvent être utilisées
+    directement depuis les processus workers ; les autres sont alimentées
+    par le processus principal.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def write(self, filename: str, data: bytes) -> None:
+        """Écrit un certificat encodé"""
+
+    def link(self, source_filename: str, filename: str) -> bool:
+        """Écrit un certificat identique à un certificat déjà écrit, sans recopier ses octets.
+
+        Returns:
+            False si la destination ne sait pas le faire
+        """
+        return False
+
+    def close(self) -> None:
+        """Termine l'écriture"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DirectorySink(CertificateSink):
+    """Écrit chaque certificat dans un fichier d'un dossier"""
+
+    shared = True
+
+    def __init__(self, directory: Path):
+        """Initialise la destination.
+
+        Args:
+            directory: Dossier de sortie, créé s'il n'existe pas
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, filename: str) -> Path:
+        """Chemin du fichier d'un certificat"""
+        return self.directory / filename
+
+    def write(self, filename: str, data: bytes) -> None:
+        # Supprimer d'abord le fichier pour ne jamais écrire à travers un lien physique
+        path = self.path(filename)
+        path.unlink(missing_ok=True)
+        path.write_bytes(data)
+
+    def link(self, source_filename: str, filename: str) -> bool:
+        source = self.path(source_filename)
+        if not source.exists():
+            return False
+        path = self.path(filename)
+        path.unlink(missing_ok=True)
+        os.link(source, path)
+        return True
+
+
+class ZipSink(CertificateSink):
+    """Écrit les certificats directement dans une archive ZIP.
+
+    Les PNG étant déjà compressés, ils sont stockés sans recompression.
+    """
+
+    def __init__(self, target: Union[Path, BinaryIO]):
+        """Ouvre l'archive.
+
+        Args:
+            target: Chemin du fichier ZIP ou flux binaire (ex: io.BytesIO)
+        """
+        import zipfile
+        self.target = target
+        self._zip = zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED)
+        self._date_time = time.localtime()[:6]
+        self._filenames = set()
+        self._zip_info = zipfile.ZipInfo
+
+    def write(self, filename: str, data: bytes) -> None:
+        if filename in self._filenames:
+            raise ValueError(f"Certificat déjà présent dans l'archive : {filename}")
+        self._filenames.add(filename)
+        info = self._zip_info(filename, date_time=self._date_time)
+        info.compress_type = self._zip.compression
+        info.external_attr = 0o644 << 16
+        self._zip.writestr(info, data)
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class PdfSink(CertificateSink):
+    """Écrit tous les certificats d'une exécution dans un seul PDF, une page par certificat.
+
+    Les certificats doivent être encodés en JPEG : chaque image est intégrée
+    telle quelle dans le PDF (filtre DCTDecode), sans décodage ni
+    réencodage, et les pages sont écrites au fur et à mesure.
+    """
+
+    def __init__(self, target: Union[Path, BinaryIO], resolution: float = 72.0):
+        """Ouvre le PDF.
+
+        Args:
+            target: Chemin du fichier PDF ou flux binaire (ex: io.BytesIO)
+            resolution: Résolution en points par pouce, qui fixe la taille des pages
+        """
+        self.resolution = resolution
+        self._owns_file = not hasattr(target, "write")
+        self._file = open(target, "wb") if self._owns_file else target
+        self._offsets = {}
+        self._page_ids = []
+        self._position = 0
+        # Objets 1 (catalogue) et 2 (arbre des pages) écrits à la fermeture
+        self._next_id = 3
+        self._closed = False
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._position += len(data)
+
+    def _write_object(self, object_id: int, body: bytes, stream: Optional[bytes] = None) -> None:
+        """Écrit un objet PDF et retient sa position pour la table xref"""
+        self._offsets[object_id] = self._position
+        self._write(f"{object_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self._write(b"\nstream\n" + stream + b"\nendstream")
+        self._write(b"\nendobj\n")
+
+    def write(self, filename: str, data: bytes) -> None:
+        if not data.startswith(b"\xff\xd8"):
+            raise ValueError(f"Le certificat {filename} doit être encodé en JPEG pour être ajouté au PDF")
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            color_space = {"L": "/DeviceGray", "RGB": "/DeviceRGB"}.get(image.mode)
+        if color_space is None:
+            raise ValueError(f"Mode d'image non supporté dans le PDF : {filename}")
+
+        page_width = width * 72.0 / self.resolution
+        page_height = height * 72.0 / self.resolution
+        image_id, content_id, page_id = self._next_id, self._next_id + 1, self._next_id + 2
+        self._next_id += 3
+
+        self._write_object(image_id, (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode /Length {len(data)} >>"
+        ).encode(), data)
+        content = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._write_object(content_id, f"<< /Length {len(content)} >>".encode(), content)
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self._page_ids.append(page_id)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>".encode())
+
+        xref_position = self._position
+        xref = [f"xref\n0 {self._next_id}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{self._offsets[object_id]:010d} 00000 n \n" for object_id in range(1, self._next_id))
+        self._write("".join(xref).encode())
+        self._write(f"trailer\n<< /Size {self._next_id} /Root 1 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode())
+        if self._owns_file:
+            self._file.close()
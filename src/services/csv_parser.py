@@ -1,8 +1,89 @@
-import pandas as pd
-from typing import List
+import csv
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
-from src.models.csv_models import CsvProduct, CsvScore, ScoreComponent, CsvEvaluation
+from src.models.csv_models import CompactCsvProduct, CsvProduct, CsvSchema, CsvScore, ScoreComponent, CsvEvaluation
+from src.services.metrics import Metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from src.services.sharding import ShardSpec
+
+# Valeurs considérées comme vides, identiques aux valeurs NA par défaut de pandas.read_csv
+NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+})
+
+# Nombre de lignes d'en-tête avant les produits (en-têtes généraux, descriptions des scores,
+# descriptions des composants), sans compter la ligne de titres des colonnes
+HEADER_ROWS = 3
+
+
+@dataclass
+class ScoreLayout:
+    """Position et descriptions d'un groupe de colonnes formant un score"""
+    description: str
+    column_indices: List[int]
+    component_descriptions: List[str]
+
+
+@dataclass
+class EvaluationLayout:
+    """Position des scores (local, eco, living) et des labels d'une évaluation"""
+    scores: List[ScoreLayout]
+    label_indices: List[int]
+
+
+@dataclass
+class FormLayout:
+    """Colonnes détectées dans les en-têtes d'un formulaire"""
+    product_score_index: int
+    service_score_index: int
+    product_layout: EvaluationLayout
+    service_layout: EvaluationLayout
+
+
+class LayoutCache:
+    """Colonnes des formulaires déjà lus, indexées par leurs lignes d'en-tête.
+    
+    Les exports d'un même modèle de formulaire ont les mêmes en-têtes : la
+    recherche des colonnes de scores et la résolution des descriptions ne
+    sont alors faites qu'une fois. La clé est faite des deux lignes que la
+    détection lit (descriptions des scores et des questions), sans calcul
+    d'empreinte : la construire coûte bien moins que la détection. Les
+    layouts sont partagés en lecture seule entre les parsers.
+    """
+    
+    def __init__(self):
+        self._layouts: Dict[Tuple[Any, ...], FormLayout] = {}
+        
+        # Statistiques de l'exécution
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._layouts)
+    
+    @staticmethod
+    def fingerprint(header_rows: List[List[Optional[str]]], score_component_size: int) -> Tuple[Any, ...]:
+        """Clé des lignes d'en-tête lues par la détection et de la taille des composants"""
+        return score_component_size, tuple(header_rows[1]), tuple(header_rows[2])
+    
+    def get(self, fingerprint: Tuple[Any, ...]) -> Optional[FormLayout]:
+        layout = self._layouts.get(fingerprint)
+        if layout is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return layout
+    
+    def put(self, fingerprint: Tuple[Any, ...], layout: FormLayout) -> None:
+        self._layouts[fingerprint] = layout
+
 
 class CsvParser:
     """Parser pour le fichier CSV des produits et services.
@@ -20,44 +101,133 @@ class CsvParser:
     
     Chaque groupe de score contient score_component_size composants,
     chacun avec une réponse Yes/No/None.
+    
+    Les lignes d'en-tête sont lues une seule fois à l'initialisation, et la
+    position des colonnes ainsi que leurs descriptions sont résolues à ce moment.
+    parse_products charge ensuite le fichier avec pandas, alors que iter_products
+    lit le fichier ligne par ligne sans pandas, avec une mémoire constante.
+    pandas et numpy ne sont importés que par les méthodes qui les utilisent.
+    
+    En mode compact, les produits sont des CompactCsvProduct : les
+    descriptions restent dans le schéma partagé (schema) et chaque produit
+    ne garde que les codes de ses réponses.
+    
+    Avec une part (shard), les lignes des autres parts sont écartées avant
+    d'être transformées en produits. Avec un LayoutCache, les colonnes d'un
+    formulaire dont les en-têtes sont déjà connus ne sont pas recherchées à
+    nouveau.
     """
     
-    def __init__(self, csv_path: Path, score_component_size: int):
+    def __init__(
+        self,
+        csv_path: Path,
+        score_component_size: int,
+        verbose: bool = True,
+        metrics: Optional[Metrics] = None,
+        compact: bool = False,
+        shard: Optional["ShardSpec"] = None,
+        layout_cache: Optional[LayoutCache] = None
+    ):
         """Initialise le parser avec le chemin du fichier et la taille des composants.
         
         Args:
             csv_path: Chemin vers le fichier CSV
             score_component_size: Nombre de composants par groupe de score
+            verbose: Afficher une ligne par produit lu
+            metrics: Mesures des étapes (aucune par défaut)
+            compact: Produire des CompactCsvProduct plutôt que des CsvProduct
+            shard: Part du formulaire à lire (toutes les lignes par défaut)
+            layout_cache: Colonnes des formulaires déjà lus, partagées entre parsers (optionnel)
         """
         self.csv_path = csv_path
         self.score_component_size = score_component_size
-        self.df = pd.read_csv(self.csv_path)
-        
+        self.verbose = verbose
+        self.metrics = metrics or Metrics()
+        self.compact = compact
+        self.shard = shard
+        self._df: Optional["pd.DataFrame"] = None
+        with self.metrics.span("read_headers"):
+            self.header_rows = self._read_header_rows()
+            
+            layout = None
+            if layout_cache is not None:
+                fingerprint = LayoutCache.fingerprint(self.header_rows, score_component_size)
+                layout = layout_cache.get(fingerprint)
+            if layout is None:
+                layout = self._detect_layout()
+                if layout_cache is not None:
+                    layout_cache.put(fingerprint, layout)
+            self.product_score_index = layout.product_score_index
+            self.service_score_index = layout.service_score_index
+            self.product_layout = layout.product_layout
+            self.service_layout = layout.service_layout
+            self.schema = self._create_schema()
+        self._answer_indices = self.answer_column_indices
+        self._label_indices = self.product_layout.label_indices + self.service_layout.label_indices
+    
+    @property
+    def df(self) -> "pd.DataFrame":
+        """Contenu complet du CSV, chargé avec pandas au premier accès"""
+        if self._df is None:
+            import pandas as pd
+            self._df = pd.read_csv(self.csv_path)
+        return self._df
+    
+    def _open(self):
+        """Ouvre le CSV pour une lecture ligne par ligne"""
+        return open(self.csv_path, newline="", encoding="utf-8-sig")
+    
+    def _read_records(self, reader) -> Iterator[List[Optional[str]]]:
+        """Lit les enregistrements non vides du CSV, les valeurs NA étant remplacées par None"""
+        for record in reader:
+            if not record:
+                continue
+            yield [None if value in NA_VALUES else value for value in record]
+    
+    def _read_header_rows(self) -> List[List[Optional[str]]]:
+        """Lit les lignes d'en-tête (après la ligne de titres des colonnes)"""
+        with self._open() as csv_file:
+            records = self._read_records(csv.reader(csv_file))
+            next(records, None)  # Ligne de titres des colonnes
+            return [next(records, []) for _ in range(HEADER_ROWS)]
+    
+    def _detect_layout(self) -> FormLayout:
+        """Recherche les colonnes de scores dans les en-têtes et résout leurs descriptions"""
         # Trouver les index de début des scores produits et services
-        self.product_score_index = self._find_score_index("product")
-        self.service_score_index = self._find_score_index("service")
+        product_score_index = self._find_score_index("product")
+        service_score_index = self._find_score_index("service")
+        
+        # Résoudre une fois les colonnes et descriptions de chaque évaluation
+        return FormLayout(
+            product_score_index=product_score_index,
+            service_score_index=service_score_index,
+            product_layout=self._create_layout(product_score_index),
+            service_layout=self._create_layout(service_score_index)
+        )
     
     def _find_score_index(self, score_type: str) -> int:
         """Trouve l'index de début d'un type de score"""
-        header_row = self.df.iloc[2]  # Les questions sont dans la ligne 3
+        header_row = self.header_rows[2]  # Les questions sont dans la ligne 3
         for idx, value in enumerate(header_row):
-            if pd.notna(value):
-                value_str = str(value).lower()
+            if value is not None:
+                value_str = value.lower()
                 if score_type == "product" and "1. product is 100%" in value_str:
                     return idx
                 elif score_type == "service" and "1. 100% of the service" in value_str:
                     return idx
         raise ValueError(f"Impossible de trouver l'index de début pour {score_type}")
     
-    def _create_evaluation(self, row: pd.Series, start_index: int) -> CsvEvaluation:
-        """Crée les scores (local, eco, living) à partir d'une ligne du CSV.
+    def _header_text(self, row: int, col_index: int) -> str:
+        """Texte d'une cellule d'en-tête ("nan" si vide, comme str(NaN) côté pandas)"""
+        header_row = self.header_rows[row]
+        value = header_row[col_index] if col_index < len(header_row) else None
+        return value if value is not None else "nan"
+    
+    def _create_layout(self, start_index: int) -> EvaluationLayout:
+        """Résout les colonnes et descriptions d'une évaluation.
         
         Args:
-            row: Ligne du CSV avec les réponses Yes/No
             start_index: Index de la première colonne des scores
-            
-        Returns:
-            Evaluation avec les scores et les labels
         """
         scores = []
         
@@ -65,56 +235,172 @@ class CsvParser:
         for group in range(3):
             # Index de base pour ce groupe
             base_index = start_index + (group * self.score_component_size)
-            
-            # Description du score (ligne 1)
-            score_description = str(self.df.iloc[1, base_index])
-            
-            # Composants du score
+            column_indices = list(range(base_index, base_index + self.score_component_size))
+            scores.append(ScoreLayout(
+                # Description du score (ligne 1)
+                description=self._header_text(1, base_index),
+                column_indices=column_indices,
+                # Description des composants (ligne 2)
+                component_descriptions=[self._header_text(2, i) for i in column_indices]
+            ))
+        
+        # Les 3 labels suivent tous les groupes de scores
+        label_start_index = start_index + (3 * self.score_component_size)
+        return EvaluationLayout(scores=scores, label_indices=list(range(label_start_index, label_start_index + 3)))
+    
+    def _create_schema(self) -> CsvSchema:
+        """Schéma partagé par les produits compacts, à partir des layouts"""
+        layouts = (self.product_layout, self.service_layout)
+        return CsvSchema(
+            score_descriptions=[[score.description for score in layout.scores] for layout in layouts],
+            component_descriptions=[[score.component_descriptions for score in layout.scores] for layout in layouts]
+        )
+    
+    def _create_evaluation(self, values: Sequence[Optional[str]], layout: EvaluationLayout) -> CsvEvaluation:
+        """Crée les scores (local, eco, living) à partir d'une ligne du CSV.
+        
+        Args:
+            values: Valeurs de la ligne (None pour une cellule vide)
+            layout: Colonnes et descriptions de l'évaluation
+        
+        Returns:
+            Evaluation avec les scores et les labels
+        """
+        scores = []
+        for score_layout in layout.scores:
             components = []
-            
-            for i in range(self.score_component_size):
-                col_index = base_index + i
-                # Description du composant (ligne 2)
-                component_description = str(self.df.iloc[2, col_index])
-                # Valeur du composant (ligne courante)
-                value = row.iloc[col_index]
+            for col_index, component_description in zip(
+                score_layout.column_indices, score_layout.component_descriptions
+            ):
+                value = values[col_index]
                 components.append(ScoreComponent(
                     description=component_description,
-                    value=str(value).strip() if pd.notna(value) else None
+                    value=value.strip() if value is not None else None
                 ))
-            
-            scores.append(CsvScore(description=score_description, score_component=components))
+            scores.append(CsvScore(description=score_layout.description, score_component=components))
         
         # Récupérer les 3 labels qui suivent tous les groupes de scores
         labels = []
-        label_start_index = start_index + (3 * self.score_component_size)
-        for i in range(3):
-            label_index = label_start_index + i
-            label = row.iloc[label_index]
-            labels.append(str(label).strip() if pd.notna(label) else "")
+        for label_index in layout.label_indices:
+            label = values[label_index]
+            labels.append(label.strip() if label is not None else "")
         
         return CsvEvaluation(scores=scores, labels=labels)
-
-    def parse_products(self) -> List[CsvProduct]:
+    
+    def _create_compact_product(self, name: str, values: Sequence[Optional[str]]) -> CompactCsvProduct:
+        """Crée un produit compact : codes des réponses et labels, sans descriptions"""
+        encode = self.schema.encode
+        answers = array("H", [
+            encode(values[i].strip() if values[i] is not None else None) for i in self._answer_indices
+        ])
+        labels = tuple(values[i].strip() if values[i] is not None else "" for i in self._label_indices)
+        return CompactCsvProduct(
+            name=name,
+            id=values[0],
+            type=values[1].strip() if values[1] is not None else None,
+            schema=self.schema,
+            answers=answers,
+            product_labels=labels[:3],
+            service_labels=labels[3:]
+        )
+    
+    def create_product(self, values: Sequence[Optional[str]]) -> Optional[Union[CsvProduct, CompactCsvProduct]]:
+        """Crée un produit à partir des valeurs d'une ligne, None pour une ligne sans nom"""
+        # Skip les lignes vides
+        if values[3] is None:  # Name est dans la 4ème colonne
+            return None
+        
+        name = values[3].strip()
+        with self.metrics.span("parse_row", item=name):
+            if self.compact:
+                product = self._create_compact_product(name, values)
+            else:
+                # Créer le produit avec ses infos de base
+                product = CsvProduct(
+                    name=name,  # Name
+                    id=values[0],  # ID
+                    type=values[1].strip() if values[1] is not None else None,  # Type
+                    product_evaluation=self._create_evaluation(values, self.product_layout),
+                    service_evaluation=self._create_evaluation(values, self.service_layout)
+                )
+        if self.verbose:
+            print(f"Produit traité avec succès : {product.name}")
+        return product
+    
+    def parse_products(self) -> List[Union[CsvProduct, CompactCsvProduct]]:
         """Parse le CSV et retourne la liste des produits avec leurs scores"""
+        import pandas as pd
         products = []
         
-        # Commencer à la ligne 4 (index 3) qui contient le premier produit
-        for _, row in self.df.iloc[3:].iterrows():
-            # Skip les lignes vides
-            if pd.isna(row.iloc[3]):  # Name est dans la 4ème colonne
-                continue
-                
-            # Créer le produit avec ses infos de base
-            product = CsvProduct(
-                name=str(row.iloc[3]).strip(),  # Name
-                id=str(row.iloc[0]) if pd.notna(row.iloc[0]) else None,  # ID
-                type=str(row.iloc[1]).strip() if pd.notna(row.iloc[1]) else None,  # Type
-                product_evaluation=self._create_evaluation(row, self.product_score_index),
-                service_evaluation=self._create_evaluation(row, self.service_score_index)
-            )
-            
-            print(f"Produit traité avec succès : {product.name}")
-            products.append(product)
-            
+        with self.metrics.span("parse_products"):
+            # Commencer à la ligne 4 (index 3) qui contient le premier produit
+            for row in self.df.iloc[HEADER_ROWS:].itertuples(index=False, name=None):
+                values = [str(value) if pd.notna(value) else None for value in row]
+                if self.shard is not None and not self.shard.contains_row(values):
+                    continue
+                product = self.create_product(values)
+                if product is not None:
+                    products.append(product)
+        
         return products
+    
+    def iter_rows(self) -> Iterator[List[Optional[str]]]:
+        """Lit les lignes de données brutes du CSV une par une, sans pandas (cellules vides à None)"""
+        width = len(self.header_rows[0])
+        with self._open() as csv_file:
+            records = self._read_records(csv.reader(csv_file))
+            # Sauter la ligne de titres et les lignes d'en-tête
+            for _ in range(1 + HEADER_ROWS):
+                next(records, None)
+            for values in records:
+                # Compléter les lignes courtes comme le fait pandas
+                if len(values) < width:
+                    values.extend([None] * (width - len(values)))
+                yield values
+    
+    def iter_products(self) -> Iterator[Union[CsvProduct, CompactCsvProduct]]:
+        """Lit le CSV ligne par ligne, sans pandas, et produit les produits au fur et à mesure.
+        
+        Donne le même résultat que parse_products, sans garder le fichier en mémoire.
+        """
+        for _, product in self.iter_indexed_products():
+            yield product
+    
+    def iter_indexed_products(self) -> Iterator[Tuple[int, Union[CsvProduct, CompactCsvProduct]]]:
+        """Comme iter_products, avec le numéro de la ligne de données de chaque produit (à partir de 0)"""
+        for row, values in enumerate(self.iter_rows()):
+            if self.shard is not None and not self.shard.contains_row(values):
+                continue
+            product = self.create_product(values)
+            if product is not None:
+                yield row, product
+    
+    @property
+    def answer_column_indices(self) -> List[int]:
+        """Index des colonnes de réponses : produit (local, eco, living) puis service"""
+        return [
+            col_index
+            for layout in (self.product_layout, self.service_layout)
+            for score_layout in layout.scores
+            for col_index in score_layout.column_indices
+        ]
+    
+    def answer_table(self) -> "np.ndarray":
+        """Lit les réponses brutes de tous les produits dans un tableau 2D.
+        
+        Returns:
+            Tableau (produits x 6 * score_component_size) de réponses nettoyées
+            (None pour une cellule vide), dans l'ordre de answer_column_indices,
+            à passer à ScoreCalculator.score_table
+        """
+        import numpy as np
+        indices = self.answer_column_indices
+        rows = []
+        for values in self.iter_rows():
+            if values[3] is None:  # Même filtre que pour les produits
+                continue
+            rows.append([values[i].strip() if values[i] is not None else None for i in indices])
+        table = np.empty((len(rows), len(indices)), dtype=object)
+        if rows:
+            table[:] = rows
+        return table
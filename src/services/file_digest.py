@@ -0,0 +1,11 @@
+import hashlib
+from pathlib import Path
+
+
+def file_digest(path: Path) -> str:
+    """Empreinte SHA-256 du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import shutil
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.csv_models import CompactCsvProduct, CsvSchema
+from src.models.score_models import Evaluation, EvaluationCriterion, ScoreProduct, ScoreTable
+from src.services.csv_parser import CsvParser
+from src.services.file_digest import file_digest
+from src.services.metrics import Metrics
+from src.services.score_calculator import ScoreCalculator
+
+CACHE_VERSION = 1
+SCHEMA_FILENAME = "schema.json"
+
+# Colonnes enregistrées chacune dans un fichier .npy
+ARRAY_NAMES = ("answers", "yes_counts", "values_found", "names", "ids", "types", "labels")
+
+# Nombre de lignes converties à la fois lors du parcours des produits
+ITER_CHUNK_ROWS = 4096
+
+
+@dataclass
+class CachedForm:
+    """Formulaire lu et scoré, sous forme de colonnes.
+
+    Les tableaux chargés depuis le cache sont projetés en mémoire (mmap) et
+    parcourus par blocs de ITER_CHUNK_ROWS lignes : seuls les blocs
+    parcourus sont lus sur le disque et convertis en objets Python. Les id
+    et types absents sont enregistrés comme chaînes vides.
+    """
+    schema: CsvSchema
+    answers: np.ndarray         # (produits, 6 * component_size) codes des réponses dans le schéma
+    score_table: ScoreTable
+    names: np.ndarray           # (produits,)
+    ids: np.ndarray             # (produits,)
+    types: np.ndarray           # (produits,)
+    labels: np.ndarray          # (produits, 6) labels produit puis service
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _iter_rows(self, *columns: np.ndarray) -> Iterator[Tuple[Any, ...]]:
+        """Valeurs de chaque ligne des colonnes, converties bloc par bloc"""
+        for start in range(0, len(self), ITER_CHUNK_ROWS):
+            stop = start + ITER_CHUNK_ROWS
+            yield from zip(*(column[start:stop].tolist() for column in columns))
+
+    def iter_compact_products(self) -> Iterator[CompactCsvProduct]:
+        """Produits compacts, identiques à ceux de CsvParser(compact=True)"""
+        for name, id, type, answers, labels in self._iter_rows(
+            self.names, self.ids, self.types, self.answers, self.labels
+        ):
+            yield CompactCsvProduct(
+                name=name,
+                id=id or None,
+                type=type or None,
+                schema=self.schema,
+                answers=array("H", answers),
+                product_labels=tuple(labels[:3]),
+                service_labels=tuple(labels[3:])
+            )
+
+    def iter_score_products(self) -> Iterator[ScoreProduct]:
+        """Produits scorés, identiques à ceux de ScoreCalculator.transform_product"""
+        descriptions = self.schema.score_descriptions
+        total_questions = self.score_table.total_questions
+        for name, id, type, yes_counts, values_found, labels in self._iter_rows(
+            self.names, self.ids, self.types,
+            self.score_table.yes_counts, self.score_table.values_found, self.labels
+        ):
+            evaluations = []
+            for index in range(2):
+                local, eco, living = (
+                    EvaluationCriterion(description=description, yes_count=yes_count, total_questions=total_questions)
+                    for description, yes_count in zip(descriptions[index], yes_counts[index])
+                )
+                evaluations.append(Evaluation(
+                    local_evaluation=local,
+                    ecofriendly_evaluation=eco,
+                    living_respect_evaluation=living,
+                    values_found=values_found[index],
+                    labels=[label for label in labels[index * 3:(index + 1) * 3] if label.strip() != ""]
+                ))
+            yield ScoreProduct(
+                name=name,
+                id=id or None,
+                type=type or None,
+                product_evaluation=evaluations[0],
+                service_evaluation=evaluations[1]
+            )
+
+    def score_products(self) -> List[ScoreProduct]:
+        """Liste des produits scorés"""
+        return list(self.iter_score_products())
+
+
+class FormCache:
+    """Cache sur disque des formulaires déjà lus et scorés.
+
+    Chaque entrée est un dossier nommé d'après l'empreinte du contenu du CSV
+    (et de la taille des composants) : un CSV modifié n'est donc jamais lu
+    depuis une ancienne entrée. Les réponses, scores et colonnes de texte
+    sont enregistrés en .npy, chargés en mmap, et les descriptions dans un
+    petit fichier JSON. Quand la taille totale dépasse max_bytes, les
+    entrées utilisées le moins récemment sont supprimées.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 256 << 20, metrics: Optional[Metrics] = None):
+        """Initialise le cache.
+
+        Args:
+            directory: Dossier du cache, créé s'il n'existe pas
+            max_bytes: Taille maximale du cache sur disque
+            metrics: Mesures des étapes (aucune par défaut)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.metrics = metrics or Metrics()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Statistiques de l'exécution
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(csv_digest: str, score_component_size: int) -> str:
+        """Clé d'un formulaire : empreinte de son contenu et des paramètres de lecture"""
+        payload = f"{CACHE_VERSION}:{csv_digest}:{score_component_size}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load_or_build(self, csv_path: Path, score_component_size: int, verbose: bool = True) -> CachedForm:
+        """Charge le formulaire depuis le cache, ou le lit, le score et l'enregistre.
+
+        Args:
+            csv_path: Chemin vers le fichier CSV
+            score_component_size: Nombre de composants par groupe de score
+            verbose: Afficher une ligne par produit lu (lecture du CSV seulement)
+        """
+        with self.metrics.span("form_cache"):
+            csv_digest = file_digest(csv_path)
+            key = self.key(csv_digest, score_component_size)
+            form = self.load(key)
+            if form is not None:
+                self.hits += 1
+                return form
+
+            self.misses += 1
+            form = self.build(csv_path, score_component_size, verbose)
+            self.store(key, form, csv_path, csv_digest)
+            return form
+
+    def build(self, csv_path: Path, score_component_size: int, verbose: bool = True) -> CachedForm:
+        """Lit et score un formulaire sans passer par le cache"""
+        parser = CsvParser(
+            csv_path, score_component_size=score_component_size, verbose=verbose,
+            metrics=self.metrics, compact=True
+        )
+        names, ids, types, labels = [], [], [], []
+        answers = array("H")
+        for product in parser.iter_products():
+            names.append(product.name)
+            ids.append(product.id or "")
+            types.append(product.type or "")
+            labels.append(product.product_labels + product.service_labels)
+            answers.extend(product.answers)
+
+        schema = parser.schema
+        answer_matrix = np.frombuffer(answers, dtype=np.uint16).reshape(len(names), len(parser.answer_column_indices))
+        # Code de réponse (vide / yes / autre) de chaque valeur du schéma
+        value_codes = ScoreCalculator.encode_answers(np.array(schema.values, dtype=object))
+        calculator = ScoreCalculator(component_size=score_component_size, metrics=self.metrics)
+        return CachedForm(
+            schema=schema,
+            answers=answer_matrix,
+            score_table=calculator.score_table(value_codes[answer_matrix]),
+            names=np.array(names, dtype=str),
+            ids=np.array(ids, dtype=str),
+            types=np.array(types, dtype=str),
+            labels=np.array(labels, dtype=str).reshape(len(names), 6)
+        )
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key
+
+    def load(self, key: str) -> Optional[CachedForm]:
+        """Charge une entrée du cache, None si elle n'existe pas ou est illisible"""
+        entry = self._entry(key)
+        try:
+            with open(entry / SCHEMA_FILENAME, encoding="utf-8") as f:
+                header = json.load(f)
+            if header.get("version") != CACHE_VERSION:
+                return None
+            arrays = {name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        except (OSError, ValueError):
+            return None
+
+        schema = CsvSchema(header["score_descriptions"], header["component_descriptions"])
+        for value in header["values"][1:]:
+            schema.encode(value)
+        # Date d'accès pour l'éviction
+        os.utime(entry / SCHEMA_FILENAME)
+        return CachedForm(
+            schema=schema,
+            answers=arrays["answers"],
+            score_table=ScoreTable(
+                yes_counts=arrays["yes_counts"],
+                values_found=arrays["values_found"],
+                total_questions=header["total_questions"]
+            ),
+            names=arrays["names"],
+            ids=arrays["ids"],
+            types=arrays["types"],
+            labels=arrays["labels"]
+        )
+
+    def store(self, key: str, form: CachedForm, csv_path: Path, csv_digest: str) -> None:
+        """Enregistre un formulaire, remplace les entrées du même fichier puis applique la taille maximale"""
+        source = str(Path(csv_path).resolve())
+        for other_key, header in list(self._headers()):
+            if other_key != key and header.get("source") == source:
+                self._remove(other_key)
+
+        entry = self._entry(key)
+        tmp_entry = self.directory / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        tmp_entry.mkdir()
+        arrays = {
+            "answers": form.answers,
+            "yes_counts": form.score_table.yes_counts,
+            "values_found": form.score_table.values_found,
+            "names": form.names,
+            "ids": form.ids,
+            "types": form.types,
+            "labels": form.labels
+        }
+        for name, values in arrays.items():
+            np.save(tmp_entry / f"{name}.npy", values)
+        header = {
+            "version": CACHE_VERSION,
+            "source": source,
+            "csv_digest": csv_digest,
+            "rows": len(form),
+            "total_questions": form.score_table.total_questions,
+            "score_descriptions": form.schema.score_descriptions,
+            "component_descriptions": form.schema.component_descriptions,
+            "values": form.schema.values
+        }
+        with open(tmp_entry / SCHEMA_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False)
+
+        # Remplacement atomique de l'entrée
+        self._remove(key)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # Entrée écrite entre-temps par un autre processus
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        self.evict(keep=key)
+
+    def _headers(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(clé, en-tête JSON) de chaque entrée du cache"""
+        for entry in self.directory.iterdir():
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                with open(entry / SCHEMA_FILENAME, encoding="utf-8") as f:
+                    yield entry.name, json.load(f)
+            except (OSError, ValueError):
+                yield entry.name, {}
+
+    def _remove(self, key: str) -> None:
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    @staticmethod
+    def _entry_size(entry: Path) -> int:
+        return sum(path.stat().st_size for path in entry.iterdir() if path.is_file())
+
+    def size_bytes(self) -> int:
+        """Taille totale des entrées du cache"""
+        return sum(self._entry_size(self._entry(key)) for key, _ in self._headers())
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes.
+
+        Args:
+            keep: Entrée à ne jamais supprimer (celle qui vient d'être utilisée)
+
+        Returns:
+            Clés des entrées supprimées
+        """
+        entries = []
+        for key, _ in self._headers():
+            entry = self._entry(key)
+            try:
+                last_used = (entry / SCHEMA_FILENAME).stat().st_mtime
+            except OSError:
+                last_used = 0.0
+            entries.append((last_used, key, self._entry_size(entry)))
+
+        total = sum(size for _, _, size in entries)
+        removed = []
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            total -= size
+            removed.append(key)
+        return removed
+
+    def invalidate(self, csv_path: Path) -> int:
+        """Supprime les entrées d'un fichier CSV (toutes versions de son contenu confondues).
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        source = str(Path(csv_path).resolve())
+        csv_digest = file_digest(csv_path) if Path(csv_path).is_file() else None
+        keys = [
+            key for key, header in self._headers()
+            if header.get("source") == source or (csv_digest is not None and header.get("csv_digest") == csv_digest)
+        ]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Supprime toutes les entrées du cache"""
+        for key, _ in list(self._headers()):
+            self._remove(key)
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.services.batch_renderer import BatchRenderer, CertificateJob, certificate_filename, select_evaluation
+from src.services.certificate_sink import DirectorySink
+from src.services.csv_parser import CsvParser
+from src.services.metrics import Metrics
+from src.services.render_cache import RenderCache
+from src.services.render_manifest import config_digest
+from src.services.score_calculator import ScoreCalculator
+from src.services.sharding import ShardSpec
+
+STATE_VERSION = 1
+STATE_FILENAME = ".watch-state.json"
+
+
+def row_digest(values: Sequence[Optional[str]]) -> str:
+    """Empreinte des valeurs brutes d'une ligne du CSV"""
+    payload = "\x1f".join("" if value is None else value for value in values)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class FormChanges:
+    """Résultat de la synchronisation d'un formulaire"""
+    form: str
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    rendered: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"{self.form} : erreur, formulaire ignoré jusqu'à sa prochaine modification ({self.error})"
+        return (f"{self.form} : {self.added} ajoutés, {self.changed} modifiés, {self.removed} retirés "
+                f"-> {self.rendered} certificats générés, {self.deleted} supprimés en {self.seconds:.2f} s")
+
+
+class FormWatcher:
+    """Surveille un dossier de formulaires CSV et tient leurs certificats à jour.
+
+    Chaque formulaire a son dossier de certificats (output_dir/<nom du CSV>)
+    avec un état : l'empreinte de chaque ligne, indexée par l'ID du produit
+    (ou son nom si l'ID est vide). Quand un CSV est ajouté ou modifié, ses
+    lignes sont comparées à cet état : seuls les produits ajoutés ou modifiés
+    sont lus, scorés et dessinés, et les certificats des produits retirés
+    sont supprimés. Relire le fichier pour calculer les empreintes reste
+    proportionnel à sa taille, mais très peu coûteux à côté du dessin.
+
+    Un fichier n'est traité qu'une fois sa taille et sa date stables entre
+    deux passages, pour ne pas lire un export en cours d'écriture. Un
+    formulaire en erreur (CSV mal formé par exemple) est signalé et garde
+    son état précédent ; il n'est retraité qu'après une modification.
+    """
+
+    def __init__(
+        self,
+        input_dir: Path,
+        output_dir: Path,
+        generator_config: Dict[str, Any],
+        jobs: int = 1,
+        render_cache: Optional[RenderCache] = None,
+        score_component_size: int = 5,
+        verbose: bool = True,
+        metrics: Optional[Metrics] = None
+    ):
+        """Initialise la surveillance.
+
+        Args:
+            input_dir: Dossier des formulaires CSV
+            output_dir: Dossier contenant un dossier de certificats par formulaire
+            generator_config: Arguments du constructeur de CertificateGenerator
+            jobs: Nombre de processus de génération (1 = en série, 0 = un par cœur)
+            render_cache: Cache des certificats déjà générés (optionnel)
+            score_component_size: Nombre de composants par groupe de score
+            verbose: Afficher une ligne par produit lu
+            metrics: Mesures des étapes (aucune par défaut)
+        """
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.score_component_size = score_component_size
+        self.verbose = verbose
+        self.metrics = metrics or Metrics()
+        self.render_cache = render_cache
+        self.config_digest = config_digest(generator_config)
+        encoder = generator_config.get("encoder")
+        self.extension = encoder.extension if encoder is not None else "png"
+        self.calculator = ScoreCalculator(component_size=score_component_size, metrics=self.metrics)
+        # Un seul renderer, dont le générateur (images et polices) reste chargé entre les passages
+        self.renderer = BatchRenderer(
+            generator_config, DirectorySink(output_dir), jobs=jobs, render_cache=render_cache, metrics=self.metrics
+        )
+        self._states: Dict[Path, Dict[str, Any]] = {}
+        # Les fichiers présents au démarrage sont considérés comme complets
+        self._last_seen: Dict[Path, Tuple[int, int]] = {
+            csv_path: self._signature(csv_path) for csv_path in self.input_dir.glob("*.csv")
+        }
+        # Signature des formulaires en erreur, et dossiers des formulaires retirés en erreur
+        self._failed: Dict[Path, Optional[Tuple[int, int]]] = {}
+
+    @staticmethod
+    def _signature(csv_path: Path) -> Optional[Tuple[int, int]]:
+        """Date de modification et taille d'un fichier, None s'il a disparu"""
+        try:
+            stat = csv_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def form_dir(self, csv_path: Path) -> Path:
+        """Dossier des certificats d'un formulaire"""
+        return self.output_dir / csv_path.stem
+
+    def _state(self, form_dir: Path) -> Dict[str, Any]:
+        """État enregistré d'un formulaire (vide s'il est absent ou illisible)"""
+        if form_dir not in self._states:
+            try:
+                with open(form_dir / STATE_FILENAME, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            self._states[form_dir] = state if state.get("version") == STATE_VERSION else {}
+        return self._states[form_dir]
+
+    def _save_state(self, form_dir: Path, state: Dict[str, Any]) -> None:
+        """Écrit l'état d'un formulaire de manière atomique"""
+        path = form_dir / STATE_FILENAME
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._states[form_dir] = state
+
+    def poll(self) -> List[FormChanges]:
+        """Un passage : synchronise les formulaires ajoutés, modifiés ou retirés.
+
+        Returns:
+            Changements de chaque formulaire traité pendant ce passage
+        """
+        results = []
+        csv_paths = sorted(self.input_dir.glob("*.csv"))
+        for csv_path in csv_paths:
+            signature = self._signature(csv_path)
+            if signature is None:
+                continue
+            state = self._state(self.form_dir(csv_path))
+            if state.get("stat") == list(signature) and state.get("config_digest") == self.config_digest:
+                continue
+            # Attendre que le fichier ne change plus entre deux passages
+            if self._last_seen.get(csv_path) != signature:
+                self._last_seen[csv_path] = signature
+                continue
+            if self._failed.get(csv_path) == signature:
+                continue
+            try:
+                results.append(self.sync(csv_path, signature))
+            except Exception as error:
+                # Une erreur sur un formulaire ne doit pas arrêter la surveillance des autres
+                self._failed[csv_path] = signature
+                results.append(FormChanges(form=csv_path.name, error=str(error)))
+            else:
+                self._failed.pop(csv_path, None)
+                self._failed.pop(self.form_dir(csv_path), None)
+
+        # Formulaires retirés du dossier : supprimer leurs certificats
+        present = {self.form_dir(csv_path) for csv_path in csv_paths}
+        for state_path in sorted(self.output_dir.glob(f"*/{STATE_FILENAME}")):
+            form_dir = state_path.parent
+            if form_dir in present or form_dir in self._failed:
+                continue
+            try:
+                results.append(self.remove_form(form_dir))
+            except Exception as error:
+                self._failed[form_dir] = None
+                results.append(FormChanges(form=f"{form_dir.name}.csv", error=str(error)))
+        return results
+
+    def sync(self, csv_path: Path, signature: Optional[Tuple[int, int]] = None) -> FormChanges:
+        """Met à jour les certificats d'un formulaire d'après les lignes qui ont changé"""
+        start = time.perf_counter()
+        form_dir = self.form_dir(csv_path)
+        changes = FormChanges(form=csv_path.name)
+        parser = CsvParser(
+            csv_path, score_component_size=self.score_component_size, verbose=self.verbose,
+            metrics=self.metrics, compact=True
+        )
+
+        state = self._state(form_dir)
+        old_rows: Dict[str, List[Any]] = state.get("rows", {})
+        header_digest = row_digest([value for row in parser.header_rows for value in row])
+        # Empreintes comparables seulement avec les mêmes en-têtes et la même configuration
+        same_layout = (state.get("header_digest") == header_digest
+                       and state.get("config_digest") == self.config_digest)
+        previous = old_rows if same_layout else {}
+
+        rows: Dict[str, List[Any]] = {}
+        row_values: Dict[str, List[Optional[str]]] = {}
+        changed_keys = set()
+        with self.metrics.span("diff_rows"):
+            for row, values in enumerate(parser.iter_rows()):
+                if values[3] is None:  # Même filtre que pour les produits
+                    continue
+                key = ShardSpec.row_key(values)
+                digest = row_digest(values)
+                rows[key] = [digest, certificate_filename(values[3].strip(), self.extension), row]
+                row_values[key] = values
+                old = previous.get(key)
+                if old is None or old[0] != digest or key in changed_keys:
+                    changed_keys.add(key)
+
+        changes.added = sum(1 for key in changed_keys if key not in previous)
+        changes.changed = len(changed_keys) - changes.added
+        changes.removed = len(old_rows.keys() - rows.keys())
+
+        # Produit propriétaire de chaque fichier : la dernière ligne qui y écrit
+        owners = self._owners(rows)
+        old_owners = self._owners(old_rows)
+        certificate_jobs = []
+        for filename, key in owners.items():
+            if (key in changed_keys or old_owners.get(filename) != key
+                    or not (form_dir / filename).exists()):
+                product = parser.create_product(row_values[key])
+                score = select_evaluation(self.calculator.transform_product(product))
+                certificate_jobs.append(CertificateJob(score=score, filename=filename))
+
+        self.renderer.sink = DirectorySink(form_dir)
+        if self.render_cache is not None:
+            # Les fichiers écrits lors des passages précédents ont pu changer depuis
+            self.render_cache.forget_written()
+        self.renderer.render(certificate_jobs)
+        changes.rendered = len(certificate_jobs)
+
+        for filename in old_owners.keys() - owners.keys():
+            (form_dir / filename).unlink(missing_ok=True)
+            changes.deleted += 1
+
+        self._save_state(form_dir, {
+            "version": STATE_VERSION,
+            "config_digest": self.config_digest,
+            "header_digest": header_digest,
+            "stat": list(signature or self._signature(csv_path)),
+            "rows": rows
+        })
+        changes.seconds = time.perf_counter() - start
+        return changes
+
+    def remove_form(self, form_dir: Path) -> FormChanges:
+        """Supprime les certificats et l'état d'un formulaire retiré du dossier"""
+        start = time.perf_counter()
+        rows = self._state(form_dir).get("rows", {})
+        changes = FormChanges(form=f"{form_dir.name}.csv", removed=len(rows))
+        for filename in self._owners(rows):
+            (form_dir / filename).unlink(missing_ok=True)
+            changes.deleted += 1
+        (form_dir / STATE_FILENAME).unlink(missing_ok=True)
+        self._states.pop(form_dir, None)
+        if not any(form_dir.iterdir()):
+            form_dir.rmdir()
+        changes.seconds = time.perf_counter() - start
+        return changes
+
+    @staticmethod
+    def _owners(rows: Dict[str, List[Any]]) -> Dict[str, str]:
+        """Produit dont le certificat occupe chaque fichier (la dernière ligne l'emporte)"""
+        owners = {}
+        for key, (_, filename, _) in sorted(rows.items(), key=lambda item: item[1][2]):
+            owners[filename] = key
+        return owners
@@ -0,0 +1,128 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Contexte vide réutilisé par les métriques désactivées
+_NULL_SPAN = nullcontext()
+
+
+class Metrics:
+    """Point d'accroche des mesures de la génération.
+
+    Les services (CsvParser, ScoreCalculator, CertificateGenerator,
+    BatchRenderer) entourent chaque étape d'un appel à span(). Cette classe
+    ne mesure rien et ne coûte presque rien : c'est la valeur par défaut.
+    Pour mesurer, passer une instance de TimingMetrics (ou d'une sous-classe
+    de Metrics qui redéfinit span).
+    """
+
+    def span(self, stage: str, item: Optional[str] = None):
+        """Contexte autour d'une étape.
+
+        Args:
+            stage: Nom de l'étape (ex: "transform_product", "draw_score")
+            item: Produit ou certificat concerné ; les étapes imbriquées lui
+                sont attribuées
+        """
+        return _NULL_SPAN
+
+
+class TimingMetrics(Metrics):
+    """Mesure la durée de chaque étape, par produit et au total, et la mémoire maximale.
+
+    Utilisable depuis plusieurs threads : chaque thread a sa propre pile de
+    produits en cours et les totaux sont mis à jour sous un verrou.
+    """
+
+    def __init__(self, per_item: bool = True):
+        """Initialise les compteurs.
+
+        Args:
+            per_item: Garder aussi le détail des durées par produit
+        """
+        # Importé ici : seules les mesures détaillées en ont besoin
+        import threading
+        self.per_item = per_item
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.items: Dict[str, Dict[str, float]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @property
+    def _items_stack(self) -> List[str]:
+        """Produits en cours de mesure dans le thread courant"""
+        stack = getattr(self._local, "items_stack", None)
+        if stack is None:
+            stack = self._local.items_stack = []
+        return stack
+
+    @contextmanager
+    def span(self, stage: str, item: Optional[str] = None):
+        if item is not None:
+            self._items_stack.append(item)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+            if item is not None:
+                self._items_stack.pop()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Ajoute une durée mesurée à une étape (et au produit en cours)"""
+        items_stack = self._items_stack
+        with self._lock:
+            totals = self.stages.get(stage)
+            if totals is None:
+                totals = self.stages[stage] = {"count": 0, "total": 0.0, "min": seconds, "max": seconds}
+            totals["count"] += 1
+            totals["total"] += seconds
+            totals["min"] = min(totals["min"], seconds)
+            totals["max"] = max(totals["max"], seconds)
+
+            if self.per_item and items_stack:
+                item_stages = self.items.setdefault(items_stack[-1], {})
+                item_stages[stage] = item_stages.get(stage, 0.0) + seconds
+
+    @staticmethod
+    def peak_memory_mb() -> Optional[float]:
+        """Mémoire résidente maximale du processus en Mo (None si non disponible)"""
+        if resource is None:
+            return None
+        # ru_maxrss est en Ko sous Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def report(self) -> Dict[str, Any]:
+        """Rapport des durées par étape et par produit"""
+        stages = {
+            stage: {
+                "count": int(totals["count"]),
+                "total_seconds": round(totals["total"], 6),
+                "mean_ms": round(totals["total"] / totals["count"] * 1000, 3),
+                "min_ms": round(totals["min"] * 1000, 3),
+                "max_ms": round(totals["max"] * 1000, 3)
+            }
+            for stage, totals in self.stages.items()
+        }
+        return {
+            "wall_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_memory_mb": self.peak_memory_mb(),
+            "stages": stages,
+            "items": {
+                item: {stage: round(seconds * 1000, 3) for stage, seconds in item_stages.items()}
+                for item, item_stages in self.items.items()
+            }
+        }
+
+    def write_json(self, path: Path) -> None:
+        """Écrit le rapport en JSON (durées par produit en millisecondes)"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
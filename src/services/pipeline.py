@@ -0,0 +1,233 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Empty, Queue
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from src.services.batch_renderer import CertificateJob, deduplicate_jobs
+from src.services.certificate_generator import CertificateGenerator
+from src.services.certificate_sink import CertificateSink
+from src.services.metrics import Metrics
+from src.services.render_cache import RenderCache
+
+# Fin du flux des jobs, envoyée par le thread de lecture
+_END = object()
+
+
+@dataclass
+class _InFlight:
+    """Certificat dessiné ou en attente, dont l'encodage et l'écriture ne sont pas terminés"""
+    job: CertificateJob
+    future: "Future[bytes]"
+    cache_key: Optional[str]
+    cached: bool
+
+
+class PipelineRenderer:
+    """Génère les certificats en flux, avec des étapes qui se recouvrent.
+
+    Trois étapes travaillent en même temps :
+    - un thread lit les jobs (lecture du CSV et scores, s'ils sont produits
+      à la demande) et les place dans une file ;
+    - le thread appelant dessine chaque certificat ;
+    - un pool de threads encode les images (la compression libère le GIL)
+      et écrit les fichiers.
+
+    Au plus max_in_flight certificats sont en cours entre la lecture et
+    l'écriture : quand la limite est atteinte, la lecture attend
+    l'écriture du plus ancien. La mémoire reste donc constante quelle que
+    soit la taille du formulaire, et le débit tend vers celui de l'étape la
+    plus lente.
+
+    Pour une destination partagée (dossier), les jobs peuvent arriver au fur
+    et à mesure et les fichiers sont écrits par le pool ; un même fichier
+    n'est jamais écrit par deux threads à la fois et le dernier job
+    l'emporte. Pour une archive ou un PDF, les jobs sont d'abord dédoublonnés
+    puis écrits dans leur ordre par le thread appelant.
+    """
+
+    def __init__(
+        self,
+        generator_config: Dict[str, Any],
+        sink: CertificateSink,
+        max_in_flight: int = 64,
+        writer_threads: int = 2,
+        render_cache: Optional[RenderCache] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        """Initialise le pipeline.
+
+        Args:
+            generator_config: Arguments du constructeur de CertificateGenerator
+            sink: Destination des certificats encodés
+            max_in_flight: Nombre maximal de certificats entre la lecture et l'écriture
+            writer_threads: Nombre de threads d'encodage et d'écriture
+            render_cache: Cache des certificats déjà générés (optionnel)
+            metrics: Mesures des étapes (aucune par défaut)
+        """
+        self.generator_config = generator_config
+        self.sink = sink
+        self.max_in_flight = max(1, max_in_flight)
+        self.writer_threads = max(1, writer_threads)
+        self.render_cache = render_cache
+        self.metrics = metrics or Metrics()
+        self._generator: Optional[CertificateGenerator] = None
+
+    @property
+    def generator(self) -> CertificateGenerator:
+        """Générateur utilisé par l'étape de dessin"""
+        if self._generator is None:
+            self._generator = CertificateGenerator(**self.generator_config)
+            self._generator.metrics = self.metrics
+        return self._generator
+
+    def render(
+        self,
+        certificate_jobs: Iterable[CertificateJob],
+        on_written: Optional[Callable[[CertificateJob], None]] = None
+    ) -> List[str]:
+        """Génère tous les certificats et retourne leurs noms de fichiers dans l'ordre des jobs.
+
+        Args:
+            certificate_jobs: Certificats à générer (liste, ou générateur lu au fur et à mesure)
+            on_written: Appelée pour chaque job, dans l'ordre, dès que son fichier est écrit (optionnel)
+        """
+        on_written = on_written or (lambda job: None)
+        if not self.sink.shared:
+            # Une archive ne peut pas remplacer un fichier : garder le dernier job de chaque fichier
+            certificate_jobs = deduplicate_jobs(list(certificate_jobs))
+
+        slots = threading.Semaphore(self.max_in_flight)
+        stop = threading.Event()
+        jobs: "Queue[Any]" = Queue()
+        reader = threading.Thread(
+            target=self._read_jobs, args=(certificate_jobs, jobs, slots, stop), name="pipeline-reader", daemon=True
+        )
+        reader.start()
+
+        filenames: List[str] = []
+        in_flight: Deque[_InFlight] = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=self.writer_threads, thread_name_prefix="pipeline-writer") as writers:
+                # Dernier certificat en cours pour chaque fichier et pour chaque clé du cache
+                pending_files: Dict[str, _InFlight] = {}
+                pending_keys: Dict[str, _InFlight] = {}
+                while True:
+                    # Terminer les certificats déjà écrits, sans attendre
+                    while in_flight and in_flight[0].future.done():
+                        self._complete(in_flight.popleft(), pending_files, pending_keys, slots, on_written)
+                    try:
+                        item = jobs.get(block=not in_flight)
+                    except Empty:
+                        # Rien à dessiner : attendre l'écriture du plus ancien pour libérer la lecture
+                        self._complete(in_flight.popleft(), pending_files, pending_keys, slots, on_written)
+                        continue
+                    if item is _END:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+
+                    entry = self._submit(item, writers, pending_files, pending_keys)
+                    in_flight.append(entry)
+                    pending_files[item.filename] = entry
+                    if entry.cache_key is not None:
+                        pending_keys[entry.cache_key] = entry
+                    filenames.append(item.filename)
+
+                while in_flight:
+                    self._complete(in_flight.popleft(), pending_files, pending_keys, slots, on_written)
+        finally:
+            stop.set()
+            reader.join()
+        return filenames
+
+    def _read_jobs(
+        self,
+        certificate_jobs: Iterable[CertificateJob],
+        jobs: "Queue[Any]",
+        slots: threading.Semaphore,
+        stop: threading.Event
+    ) -> None:
+        """Étape de lecture : place les jobs dans la file, dans la limite des places libres"""
+        try:
+            for job in certificate_jobs:
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                jobs.put(job)
+            jobs.put(_END)
+        except BaseException as error:
+            jobs.put(error)
+
+    def _submit(
+        self,
+        job: CertificateJob,
+        writers: ThreadPoolExecutor,
+        pending_files: Dict[str, _InFlight],
+        pending_keys: Dict[str, _InFlight]
+    ) -> _InFlight:
+        """Étape de dessin : dessine le certificat (sauf s'il est connu) et confie la suite au pool"""
+        previous = pending_files.get(job.filename)
+        if previous is not None and self.sink.shared:
+            # Ne jamais écrire le même fichier depuis deux threads : attendre l'écriture précédente
+            previous.future.result()
+
+        cache_key = None
+        if self.render_cache is not None:
+            cache_key = self.render_cache.key(job.score)
+            same = pending_keys.get(cache_key)
+            if same is not None:
+                # Certificat identique en cours d'encodage : réutiliser ses octets
+                self.render_cache.hits += 1
+                future = writers.submit(self._write_bytes, job.filename, same.future)
+                return _InFlight(job, future, cache_key, cached=True)
+            data = self.render_cache.get(cache_key)
+            if data is not None:
+                self.render_cache.hits += 1
+                future = writers.submit(self._write, job.filename, data)
+                return _InFlight(job, future, cache_key, cached=True)
+            self.render_cache.misses += 1
+
+        with self.metrics.span("certificate", item=job.filename):
+            image = self.generator.render_certificate(job.score)
+        future = writers.submit(self._encode_and_write, job.filename, image)
+        return _InFlight(job, future, cache_key, cached=False)
+
+    def _encode_and_write(self, filename: str, image) -> bytes:
+        """Étape d'encodage et d'écriture, dans un thread du pool"""
+        with self.metrics.span("encode", item=filename):
+            data = self.generator.encoder.encode(image)
+        return self._write(filename, data)
+
+    def _write_bytes(self, filename: str, source: "Future[bytes]") -> bytes:
+        """Écrit les octets d'un certificat identique encodé par un autre job"""
+        return self._write(filename, source.result())
+
+    def _write(self, filename: str, data: bytes) -> bytes:
+        if self.sink.shared:
+            with self.metrics.span("write", item=filename):
+                self.sink.write(filename, data)
+        return data
+
+    def _complete(
+        self,
+        entry: _InFlight,
+        pending_files: Dict[str, _InFlight],
+        pending_keys: Dict[str, _InFlight],
+        slots: threading.Semaphore,
+        on_written: Callable[[CertificateJob], None]
+    ) -> None:
+        """Termine le plus ancien certificat : écriture ordonnée si besoin, cache et place libérée"""
+        data = entry.future.result()
+        if not self.sink.shared:
+            with self.metrics.span("write", item=entry.job.filename):
+                self.sink.write(entry.job.filename, data)
+        if entry.cache_key is not None and not entry.cached:
+            self.render_cache.put(entry.cache_key, data)
+        if pending_files.get(entry.job.filename) is entry:
+            del pending_files[entry.job.filename]
+        if entry.cache_key is not None and pending_keys.get(entry.cache_key) is entry:
+            del pending_keys[entry.cache_key]
+        on_written(entry.job)
+        slots.release()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.models.score_models import Evaluation
+from src.services.certificate_sink import CertificateSink
+
+
+class RenderCache:
+    """Cache des certificats déjà encodés, indexé par leur contenu visuel.
+
+    Beaucoup de produits ont exactement le même certificat (mêmes scores et
+    mêmes labels). Le cache garde les octets encodés des derniers certificats
+    générés dans un LRU borné, et optionnellement dans un dossier sur disque
+    pour les exécutions suivantes. Un certificat déjà connu est écrit
+    directement depuis le cache, ou sous forme de lien physique vers le
+    premier fichier identique écrit pendant l'exécution.
+    """
+
+    def __init__(
+        self,
+        config_key: str,
+        max_entries: int = 256,
+        directory: Optional[Path] = None,
+        use_hardlinks: bool = False,
+        extension: str = "png"
+    ):
+        """Initialise le cache.
+
+        Args:
+            config_key: Empreinte de la configuration du générateur (voir
+                render_manifest.config_digest), incluse dans chaque clé
+            max_entries: Nombre maximal de certificats gardés en mémoire
+            directory: Dossier de stockage sur disque (optionnel)
+            use_hardlinks: Écrire les doublons comme liens physiques
+            extension: Extension des fichiers du cache sur disque (celle de l'encodeur)
+        """
+        self.config_key = config_key
+        self.max_entries = max_entries
+        self.directory = directory
+        self.use_hardlinks = use_hardlinks
+        self.extension = extension
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._written: Dict[str, str] = {}
+
+        # Statistiques de l'exécution
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        """Nombre de certificats gardés en mémoire"""
+        return len(self._entries)
+
+    @property
+    def renders_saved(self) -> int:
+        """Nombre de certificats écrits sans être générés"""
+        return self.hits
+
+    def key(self, score: Evaluation) -> str:
+        """Clé du contenu visuel d'un certificat (descriptions, scores et labels)"""
+        visual = [
+            [criterion.description, criterion.yes_count, criterion.total_questions]
+            for criterion in (score.local_evaluation, score.ecofriendly_evaluation, score.living_respect_evaluation)
+        ]
+        payload = json.dumps([self.config_key, visual, score.labels], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Retourne les octets du certificat, depuis la mémoire puis le disque"""
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            return data
+        if self.directory is not None:
+            try:
+                data = self._path(key).read_bytes()
+            except OSError:
+                return None
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Ajoute un certificat encodé au cache"""
+        self._remember(key, data)
+        if self.directory is not None:
+            path = self._path(key)
+            if not path.exists():
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+
+    def _path(self, key: str) -> Path:
+        """Fichier d'un certificat dans le dossier du cache"""
+        return self.directory / f"{key}.{self.extension}"
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Ajoute une entrée au LRU en retirant la plus ancienne si besoin"""
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def mark_written(self, key: str, filename: str) -> None:
+        """Retient le fichier écrit pour une clé, cible des liens physiques suivants"""
+        self._written.setdefault(key, filename)
+
+    def forget_written(self) -> None:
+        """Oublie les fichiers écrits, quand la destination a pu être modifiée depuis"""
+        self._written.clear()
+
+    def write(self, key: str, sink: CertificateSink, filename: str, data: Optional[bytes] = None) -> bool:
+        """Écrit un certificat connu dans la destination sans le générer.
+
+        Args:
+            key: Clé du certificat (voir key)
+            sink: Destination du certificat
+            filename: Nom du fichier du certificat dans la destination
+            data: Octets du certificat s'ils sont déjà disponibles (sinon lus dans le cache)
+
+        Returns:
+            True si le certificat a été écrit, False s'il n'était pas dans le cache
+        """
+        source = self._written.get(key)
+        if self.use_hardlinks and source is not None and source != filename and sink.link(source, filename):
+            self.hits += 1
+            return True
+
+        if data is None:
+            data = self.get(key)
+        if data is None:
+            self.misses += 1
+            return False
+        sink.write(filename, data)
+        self.mark_written(key, filename)
+        self.hits += 1
+        return True
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from src.models.score_models import Evaluation
+from src.services.batch_renderer import CertificateJob
+from src.services.file_digest import file_digest
+
+MANIFEST_FILENAME = ".certificates-manifest.json"
+MANIFEST_VERSION = 1
+
+# Options du générateur sans effet sur les pixels, ignorées par config_digest
+NON_VISUAL_KEYS = frozenset({"asset_cache_dir"})
+
+
+def config_digest(generator_config: Dict[str, Any]) -> str:
+    """Empreinte de la configuration du générateur.
+
+    Les chemins vers des fichiers (template, feuilles, polices) sont remplacés
+    par l'empreinte de leur contenu : modifier une image invalide donc tous
+    les certificats, même si son chemin ne change pas.
+    """
+    values = {}
+    for key, value in sorted(generator_config.items()):
+        if key in NON_VISUAL_KEYS:
+            continue
+        if isinstance(value, Path) and value.is_file():
+            values[key] = file_digest(value)
+        else:
+            values[key] = repr(value)
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode()).hexdigest()
+
+
+class RenderManifest:
+    """Manifeste des certificats déjà générés dans un dossier de sortie.
+
+    Pour chaque fichier, le manifeste garde une empreinte de tout ce qui sert à
+    le dessiner (champs de l'Evaluation, labels, images, polices et paramètres
+    de mise en page). Lors d'une nouvelle génération, seuls les certificats dont
+    l'empreinte a changé (ou dont le fichier a disparu) sont générés à nouveau,
+    et les certificats qui ne correspondent plus à aucun produit sont supprimés.
+    """
+
+    # Nom du fichier du manifeste dans le dossier de sortie
+    filename = MANIFEST_FILENAME
+
+    def __init__(self, output_dir: Path, generator_config: Dict[str, Any]):
+        """Charge le manifeste du dossier de sortie s'il existe.
+
+        Args:
+            output_dir: Dossier contenant les certificats
+            generator_config: Arguments du constructeur de CertificateGenerator
+        """
+        self.output_dir = output_dir
+        self.path = output_dir / self.filename
+        self.config_digest = config_digest(generator_config)
+        self.entries: Dict[str, str] = self._load()
+
+    def _load(self) -> Dict[str, str]:
+        """Lit les empreintes enregistrées (vide si le manifeste est absent ou illisible)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return dict(data.get("certificates", {}))
+
+    def certificate_hash(self, score: Evaluation) -> str:
+        """Empreinte des données de rendu d'un certificat"""
+        payload = json.dumps(asdict(score), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256((self.config_digest + payload).encode("utf-8")).hexdigest()
+
+    def pending_jobs(self, certificate_jobs: Sequence[CertificateJob]) -> List[CertificateJob]:
+        """Retourne les certificats à générer : nouveaux, modifiés ou dont le fichier manque"""
+        pending = []
+        for job in certificate_jobs:
+            if (self.entries.get(job.filename) != self.certificate_hash(job.score)
+                    or not (self.output_dir / job.filename).exists()):
+                pending.append(job)
+        return pending
+
+    def update(self, certificate_jobs: Sequence[CertificateJob]) -> List[Path]:
+        """Enregistre les certificats générés et supprime ceux qui n'existent plus.
+
+        Args:
+            certificate_jobs: Tous les certificats de la génération courante
+
+        Returns:
+            Chemins des certificats supprimés
+        """
+        entries = {job.filename: self.certificate_hash(job.score) for job in certificate_jobs}
+
+        removed = []
+        for name in self.entries.keys() - entries.keys():
+            stale_path = self.output_dir / name
+            if stale_path.exists():
+                stale_path.unlink()
+                removed.append(stale_path)
+
+        self.entries = entries
+        return removed
+
+    def save(self) -> None:
+        """Écrit le manifeste de manière atomique"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "certificates": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,337 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.models.csv_models import CsvEvaluation, CsvProduct, CsvScore, ScoreComponent
+from src.models.score_models import Evaluation
+from src.services.batch_renderer import CertificateJob, certificate_filename, init_worker, render_chunk, select_evaluation
+from src.services.certificate_sink import ZipSink
+from src.services.csv_parser import CsvParser, EvaluationLayout
+from src.services.render_cache import RenderCache
+from src.services.render_manifest import config_digest
+from src.services.score_calculator import ScoreCalculator
+
+
+class ServiceOverloaded(Exception):
+    """La file des certificats à générer est pleine"""
+
+
+class LatencyStats:
+    """Latences et débit des requêtes récentes"""
+
+    def __init__(self, window: int = 10_000):
+        """Initialise les compteurs.
+
+        Args:
+            window: Nombre de latences récentes gardées pour les percentiles
+        """
+        self.latencies: deque = deque(maxlen=window)
+        self.completions: deque = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Ajoute la durée d'une requête terminée"""
+        self.count += 1
+        self.errors += error
+        self.latencies.append(seconds)
+        self.completions.append(time.monotonic())
+
+    def report(self, recent_seconds: float = 10.0) -> Dict[str, Any]:
+        """Percentiles de latence (ms) et débit (requêtes par seconde)"""
+        now = time.monotonic()
+        latencies = sorted(self.latencies)
+        recent = sum(1 for completed in self.completions if now - completed <= recent_seconds)
+        report = {
+            "requests": self.count,
+            "errors": self.errors,
+            "throughput_rps": round(self.count / max(now - self.started, 1e-9), 3),
+            "recent_throughput_rps": round(recent / recent_seconds, 3)
+        }
+        for name, fraction in (("p50_ms", 0.50), ("p90_ms", 0.90), ("p99_ms", 0.99)):
+            report[name] = round(percentile(latencies, fraction) * 1000, 3) if latencies else None
+        report["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else None
+        return report
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentile (méthode du rang le plus proche) d'une liste triée non vide"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _evaluation_from_json(payload: Any, layout: EvaluationLayout, label_count: int) -> CsvEvaluation:
+    """Construit une évaluation à partir des réponses JSON d'un critère.
+
+    Args:
+        payload: {"answers": [[...], [...], [...]], "labels": [...]}, ou None
+            pour une évaluation sans réponse
+        layout: Descriptions de l'évaluation
+        label_count: Nombre maximal de labels
+    """
+    payload = payload or {}
+    if not isinstance(payload, dict):
+        raise ValueError("Une évaluation doit être un objet JSON")
+    answers = payload.get("answers") or [[None] * len(score.column_indices) for score in layout.scores]
+    labels = payload.get("labels") or []
+    if not isinstance(answers, list) or len(answers) != len(layout.scores):
+        raise ValueError(f"'answers' doit contenir {len(layout.scores)} listes (local, eco, living)")
+    if not isinstance(labels, list) or len(labels) > label_count or not all(isinstance(l, str) for l in labels):
+        raise ValueError(f"'labels' doit être une liste d'au plus {label_count} chaînes")
+
+    scores = []
+    for score_layout, score_answers in zip(layout.scores, answers):
+        if not isinstance(score_answers, list) or len(score_answers) != len(score_layout.component_descriptions):
+            raise ValueError(f"Chaque critère doit avoir {len(score_layout.component_descriptions)} réponses")
+        components = []
+        for description, value in zip(score_layout.component_descriptions, score_answers):
+            if value is not None and not isinstance(value, str):
+                raise ValueError("Une réponse doit être une chaîne (ex: \"Yes\") ou null")
+            if value is not None:
+                # Une réponse vide compte comme une cellule vide du CSV
+                value = value.strip() or None
+            components.append(ScoreComponent(description=description, value=value))
+        scores.append(CsvScore(description=score_layout.description, score_component=components))
+    return CsvEvaluation(scores=scores, labels=[label.strip() for label in labels])
+
+
+class RenderService:
+    """Génère des certificats à la demande, pour le service HTTP.
+
+    Les scores sont calculés comme dans la génération par lots, avec les
+    descriptions du formulaire de référence. Les certificats demandés en
+    même temps sont regroupés en lots (jusqu'à max_batch_size, ou après
+    max_batch_delay secondes) et générés dans un pool de processus borné ;
+    une même demande en cours n'est générée qu'une fois. Les certificats
+    récents sont gardés dans un LRU (RenderCache).
+    """
+
+    def __init__(
+        self,
+        generator_config: Dict[str, Any],
+        schema_csv: Path,
+        score_component_size: int = 5,
+        workers: int = 0,
+        max_batch_size: int = 8,
+        max_batch_delay: float = 0.005,
+        cache_entries: int = 1024,
+        max_queue: int = 1024
+    ):
+        """Initialise le service (le pool de processus est créé par start).
+
+        Args:
+            generator_config: Arguments du constructeur de CertificateGenerator
+            schema_csv: Formulaire dont les en-têtes donnent les descriptions
+            score_component_size: Nombre de composants par groupe de score
+            workers: Nombre de processus de génération (0 = un par cœur)
+            max_batch_size: Nombre maximal de certificats par lot
+            max_batch_delay: Attente maximale (secondes) pour compléter un lot
+            cache_entries: Nombre de certificats gardés en mémoire
+            max_queue: Nombre maximal de certificats en attente avant de refuser
+        """
+        self.generator_config = generator_config
+        self.score_component_size = score_component_size
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_queue = max_queue
+        self.extension = generator_config["encoder"].extension
+        self.parser = CsvParser(schema_csv, score_component_size=score_component_size, verbose=False)
+        self.calculator = ScoreCalculator(component_size=score_component_size)
+        self.cache = RenderCache(config_digest(generator_config), max_entries=cache_entries)
+
+        self.stats = LatencyStats()
+        self.render_stats = LatencyStats()
+        self.batches = 0
+        self.batched_certificates = 0
+        # Demandes servies par un rendu déjà en cours pour le même certificat
+        self.coalesced = 0
+
+        self._executor = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks = set()
+
+    async def start(self) -> None:
+        """Démarre le pool de processus et la boucle de regroupement en lots"""
+        from concurrent.futures import ProcessPoolExecutor
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.generator_config,)
+        )
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # Au plus deux lots en cours par worker : les suivants attendent dans la file
+        self._slots = asyncio.Semaphore(self.workers * 2)
+        self._spawn(self._batch_loop())
+
+    async def close(self) -> None:
+        """Arrête la boucle de regroupement et le pool de processus"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def render_score(self, score: Evaluation) -> bytes:
+        """Retourne le certificat encodé d'un score, depuis le cache ou un lot"""
+        key = self.cache.key(score)
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache.hits += 1
+            return data
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.cache.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            try:
+                self._queue.put_nowait((key, score))
+            except asyncio.QueueFull:
+                raise ServiceOverloaded(f"Plus de {self.max_queue} certificats en attente")
+            self._inflight[key] = future
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'une requête n'annule pas le rendu partagé
+        return await asyncio.shield(future)
+
+    async def _batch_loop(self) -> None:
+        """Regroupe les demandes en lots et les envoie au pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_batch_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            self._spawn(self._render_batch(batch))
+
+    async def _render_batch(self, batch: List[Tuple[str, Evaluation]]) -> None:
+        """Génère un lot dans le pool et transmet chaque certificat à ses requêtes"""
+        start = time.perf_counter()
+        jobs = [CertificateJob(score=score, filename=key) for key, score in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, render_chunk, jobs, None, True
+            )
+        except Exception as error:
+            for key, _ in batch:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_exception(error)
+            self.render_stats.record(time.perf_counter() - start, error=True)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.batched_certificates += len(batch)
+        self.render_stats.record(time.perf_counter() - start)
+        for (key, _), data in zip(batch, results):
+            self.cache.put(key, data)
+            future = self._inflight.pop(key)
+            if not future.done():
+                future.set_result(data)
+
+    async def render_json(self, payload: Any) -> Tuple[str, bytes]:
+        """Génère le certificat d'un produit décrit en JSON.
+
+        Args:
+            payload: {"name": ..., "product": {"answers": ..., "labels": ...},
+                "service": {...}}, les réponses de chaque évaluation étant trois
+                listes (local, eco, living) de score_component_size réponses
+
+        Returns:
+            Nom de fichier et octets du certificat
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("Le corps de la requête doit être un objet JSON")
+        name = payload.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("'name' est obligatoire")
+        label_count = len(self.parser.product_layout.label_indices)
+        csv_product = CsvProduct(
+            name=name.strip(),
+            id=payload.get("id"),
+            type=payload.get("type"),
+            product_evaluation=_evaluation_from_json(payload.get("product"), self.parser.product_layout, label_count),
+            service_evaluation=_evaluation_from_json(payload.get("service"), self.parser.service_layout, label_count)
+        )
+        product = self.calculator.transform_product(csv_product)
+        data = await self.render_score(select_evaluation(product))
+        return certificate_filename(product.name, self.extension), data
+
+    async def render_csv(self, content: bytes) -> List[Tuple[str, bytes]]:
+        """Génère les certificats de tous les produits d'un formulaire CSV envoyé.
+
+        Returns:
+            Nom de fichier et octets de chaque certificat, dans l'ordre du CSV
+        """
+        loop = asyncio.get_running_loop()
+        jobs = await loop.run_in_executor(None, self._score_csv, content)
+        if not jobs:
+            raise ValueError("Le formulaire ne contient aucun produit")
+        results = await asyncio.gather(*(self.render_score(job.score) for job in jobs))
+        return [(job.filename, data) for job, data in zip(jobs, results)]
+
+    def _score_csv(self, content: bytes) -> List[CertificateJob]:
+        """Lit et score un formulaire CSV (dans un thread)"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = Path(tmp_dir) / "form.csv"
+            csv_path.write_bytes(content)
+            parser = CsvParser(csv_path, score_component_size=self.score_component_size, verbose=False, compact=True)
+            jobs = {}
+            for csv_product in parser.iter_products():
+                product = self.calculator.transform_product(csv_product)
+                filename = certificate_filename(product.name, self.extension)
+                # Comme en mode lot, le dernier produit d'un même nom l'emporte
+                jobs[filename] = CertificateJob(score=select_evaluation(product), filename=filename)
+            return list(jobs.values())
+
+    @staticmethod
+    def zip_certificates(certificates: List[Tuple[str, bytes]]) -> bytes:
+        """Archive ZIP de plusieurs certificats"""
+        buffer = io.BytesIO()
+        with ZipSink(buffer) as sink:
+            for filename, data in certificates:
+                sink.write(filename, data)
+        return buffer.getvalue()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Mesures du service : requêtes, rendus, lots et cache"""
+        return {
+            "requests": self.stats.report(),
+            "renders": self.render_stats.report(),
+            "batches": {
+                "count": self.batches,
+                "mean_size": round(self.batched_certificates / self.batches, 3) if self.batches else None,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "in_flight": len(self._inflight)
+            },
+            "cache": {
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self.cache),
+                "max_entries": self.cache.max_entries
+            },
+            "workers": self.workers
+        }
@@ -1,7 +1,35 @@
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
 
-from src.models.score_models import Evaluation, ScoreProduct, EvaluationCriterion
-from src.models.csv_models import CsvProduct, CsvEvaluation
+from src.models.score_models import Evaluation, ScoreProduct, EvaluationCriterion, ScoreTable
+from src.models.csv_models import CompactCsvProduct, CsvProduct, CsvEvaluation
+from src.services.metrics import Metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Codes des réponses utilisés pour le calcul vectorisé
+ANSWER_EMPTY = 0
+ANSWER_YES = 1
+ANSWER_OTHER = 2
+
+# Toutes les casses possibles de "yes", pour comparer sans str.lower
+_YES_VARIANTS = [
+    a + b + c for a in ("y", "Y") for b in ("e", "E") for c in ("s", "S")
+]
+
+
+class _AnswerCodes(dict):
+    """Cache valeur -> code de réponse, rempli au premier accès à chaque valeur"""
+    
+    def __missing__(self, answer) -> int:
+        if answer is None:
+            code = ANSWER_EMPTY
+        elif answer.lower() == "yes":
+            code = ANSWER_YES
+        else:
+            code = ANSWER_OTHER
+        self[answer] = code
+        return code
 
 
 class ScoreCalculator:
@@ -20,10 +48,16 @@ class ScoreCalculator:
     Le score final est le ratio de réponses "Yes" sur le nombre total de composants.
     """
     
-    def __init__(self, component_size: int):
-        """Initialise le calculateur avec la taille des composants"""
+    def __init__(self, component_size: int, metrics: Optional[Metrics] = None):
+        """Initialise le calculateur avec la taille des composants et les mesures (optionnelles)"""
         self.max_score = component_size
-        
+        self.metrics = metrics or Metrics()
+        self._answer_codes = _AnswerCodes()
+    
+    def answer_code(self, answer: Optional[str]) -> int:
+        """Code d'une réponse du CSV : ANSWER_EMPTY, ANSWER_YES ou ANSWER_OTHER"""
+        return self._answer_codes[answer]
+    
     def calculate_evaluation_criterion(self, description: str, answers: List[str]) -> EvaluationCriterion:
         """Calcule le score d'un composant basé sur les réponses Yes/No"""
         yes_count = sum(1 for answer in answers if answer and answer.lower() == "yes")
@@ -41,7 +75,7 @@ class ScoreCalculator:
         local_csv_evaluation = evaluation.scores[0]
         eco_csv_evaluation = evaluation.scores[1]
         living_csv_evaluation = evaluation.scores[2]
-
+        
         local_answers = [c.value for c in local_csv_evaluation.score_component]
         eco_answers = [c.value for c in eco_csv_evaluation.score_component]
         living_answers = [c.value for c in living_csv_evaluation.score_component]
@@ -58,16 +92,101 @@ class ScoreCalculator:
             labels=[label for label in evaluation.labels if label is not None and label.strip() != ""]
         )
     
-    def transform_product(self, csv_product: CsvProduct) -> ScoreProduct:
-        """Transforme un CsvProduct en ScoreProduct avec les scores calculés"""
-        return ScoreProduct(
-            name=csv_product.name,
-            id=csv_product.id,
-            type=csv_product.type,
-            product_evaluation=self.calculate_score(csv_product.product_evaluation),
-            service_evaluation=self.calculate_score(csv_product.service_evaluation)
+    def calculate_compact_score(self, csv_product: CompactCsvProduct, evaluation_index: int) -> Evaluation:
+        """Calcule une évaluation d'un produit compact directement à partir des codes des réponses.
+        
+        Donne le même résultat que calculate_score sur la vue CsvEvaluation.
+        
+        Args:
+            csv_product: Produit compact
+            evaluation_index: 0 pour l'évaluation produit, 1 pour le service
+        """
+        schema = csv_product.schema
+        size = schema.component_size
+        answers = csv_product.evaluation_answers(evaluation_index)
+        values = schema.values
+        codes = self._answer_codes
+        yes = [codes[values[code]] == ANSWER_YES for code in answers]
+        labels: Sequence[str] = csv_product.product_labels if evaluation_index == 0 else csv_product.service_labels
+        local, eco, living = (
+            EvaluationCriterion(
+                description=description,
+                yes_count=sum(yes[group * size:(group + 1) * size]),
+                total_questions=self.max_score
+            )
+            for group, description in enumerate(schema.score_descriptions[evaluation_index])
+        )
+        return Evaluation(
+            local_evaluation=local,
+            ecofriendly_evaluation=eco,
+            living_respect_evaluation=living,
+            values_found=any(answers),
+            labels=[label for label in labels if label is not None and label.strip() != ""]
         )
     
-    def transform_products(self, csv_products: List[CsvProduct]) -> List[ScoreProduct]:
+    def transform_product(self, csv_product: Union[CsvProduct, CompactCsvProduct]) -> ScoreProduct:
+        """Transforme un CsvProduct (ou un CompactCsvProduct) en ScoreProduct avec les scores calculés"""
+        with self.metrics.span("transform_product", item=csv_product.name):
+            if isinstance(csv_product, CompactCsvProduct):
+                product_evaluation = self.calculate_compact_score(csv_product, 0)
+                service_evaluation = self.calculate_compact_score(csv_product, 1)
+            else:
+                product_evaluation = self.calculate_score(csv_product.product_evaluation)
+                service_evaluation = self.calculate_score(csv_product.service_evaluation)
+            return ScoreProduct(
+                name=csv_product.name,
+                id=csv_product.id,
+                type=csv_product.type,
+                product_evaluation=product_evaluation,
+                service_evaluation=service_evaluation
+            )
+    
+    def transform_products(self, csv_products: List[Union[CsvProduct, CompactCsvProduct]]) -> List[ScoreProduct]:
         """Transforme une liste de CsvProduct en ScoreProduct"""
         return [self.transform_product(p) for p in csv_products]
+    
+    @staticmethod
+    def encode_answers(answers) -> "np.ndarray":
+        """Encode un tableau de réponses en codes ANSWER_EMPTY / ANSWER_YES / ANSWER_OTHER.
+        
+        Args:
+            answers: Tableau de réponses (None pour une cellule vide), tableau de
+                chaînes sans cellule vide, ou tableau d'entiers déjà encodé qui est
+                alors retourné tel quel
+        """
+        import numpy as np
+        answers = np.asarray(answers)
+        if answers.dtype.kind in "iub":
+            return answers.astype(np.uint8, copy=False)
+        
+        if answers.dtype.kind == "O":
+            # Une seule conversion par valeur distincte, puis recherche dans un dict
+            codes = _AnswerCodes()
+            return np.fromiter(
+                map(codes.__getitem__, answers.ravel().tolist()), dtype=np.uint8, count=answers.size
+            ).reshape(answers.shape)
+        
+        text = answers.astype(str, copy=False)
+        yes = np.zeros(answers.shape, dtype=bool)
+        for variant in _YES_VARIANTS:
+            yes |= text == variant
+        return np.where(yes, ANSWER_YES, ANSWER_OTHER).astype(np.uint8)
+    
+    def score_table(self, answers) -> ScoreTable:
+        """Calcule les scores de tous les produits d'un fichier en une passe vectorisée.
+        
+        Donne les mêmes yes_count et values_found que transform_product.
+        
+        Args:
+            answers: Tableau (produits x 6 * component_size) des réponses, dans
+                l'ordre produit (local, eco, living) puis service, tel que retourné
+                par CsvParser.answer_table, ou déjà passé par encode_answers
+        """
+        import numpy as np
+        codes = self.encode_answers(answers)
+        codes = codes.reshape(len(codes), 2, 3, self.max_score)
+        return ScoreTable(
+            yes_counts=(codes == ANSWER_YES).sum(axis=3, dtype=np.int64),
+            values_found=(codes != ANSWER_EMPTY).any(axis=(2, 3)),
+            total_questions=self.max_score
+        )
@@ -0,0 +1,225 @@
+import csv
+import json
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from src.models.csv_models import CompactCsvProduct, CsvSchema
+from src.models.score_models import ScoreProduct
+from src.services.score_calculator import ANSWER_YES, ScoreCalculator
+
+if TYPE_CHECKING:
+    from src.services.form_cache import CachedForm
+
+EVALUATIONS = ("product", "service")
+CRITERIA = ("local", "ecofriendly", "living_respect")
+
+
+class ScoreReport:
+    """Statistiques agrégées d'un formulaire, calculées en une passe.
+
+    Remplace l'affichage produit par produit pour les gros formulaires :
+    répartition des yes_count par critère, taux de "Yes" de chaque
+    question, nombre de certificats produit et service, fréquence des
+    labels et part des lignes sans aucune réponse. Chaque produit est
+    ajouté une fois (add), ou tout un formulaire du cache en une opération
+    vectorisée (add_form) ; la mémoire utilisée ne dépend pas du nombre de
+    lignes.
+    """
+
+    def __init__(self, schema: CsvSchema):
+        """Initialise un rapport vide.
+
+        Args:
+            schema: Schéma du formulaire (descriptions et valeurs des réponses)
+        """
+        self.schema = schema
+        size = schema.component_size
+        self.products = 0
+        # Certificats dessinés avec l'évaluation produit ou service, et lignes sans réponse
+        self.certificates = {evaluation: 0 for evaluation in EVALUATIONS}
+        self.empty_rows = 0
+        # Lignes ayant au moins une réponse, par évaluation
+        self.answered = {evaluation: 0 for evaluation in EVALUATIONS}
+        # Nombre de lignes pour chaque yes_count (0 à size), par évaluation et critère
+        self.yes_count_histogram = [[[0] * (size + 1) for _ in CRITERIA] for _ in EVALUATIONS]
+        # Par question (6 * size, dans l'ordre de CsvParser.answer_column_indices)
+        self.question_answers = [0] * (len(EVALUATIONS) * len(CRITERIA) * size)
+        self.question_yes = [0] * len(self.question_answers)
+        self.labels = {evaluation: Counter() for evaluation in EVALUATIONS}
+        self._calculator = ScoreCalculator(component_size=size)
+
+    def add(self, csv_product: CompactCsvProduct, score_product: ScoreProduct) -> None:
+        """Ajoute un produit compact et ses scores (ceux de ScoreCalculator.transform_product)"""
+        self.products += 1
+        values = self.schema.values
+        for index, code in enumerate(csv_product.answers):
+            if code:
+                self.question_answers[index] += 1
+                if self._calculator.answer_code(values[code]) == ANSWER_YES:
+                    self.question_yes[index] += 1
+
+        evaluations = (score_product.product_evaluation, score_product.service_evaluation)
+        for index, (evaluation, name) in enumerate(zip(evaluations, EVALUATIONS)):
+            self.labels[name].update(evaluation.labels)
+            if not evaluation.values_found:
+                continue
+            self.answered[name] += 1
+            criteria = (evaluation.local_evaluation, evaluation.ecofriendly_evaluation,
+                        evaluation.living_respect_evaluation)
+            for histogram, criterion in zip(self.yes_count_histogram[index], criteria):
+                histogram[criterion.yes_count] += 1
+
+        if evaluations[0].values_found:
+            self.certificates["product"] += 1
+        else:
+            self.certificates["service"] += 1
+            if not evaluations[1].values_found:
+                self.empty_rows += 1
+
+    def add_form(self, form: "CachedForm") -> None:
+        """Ajoute tout un formulaire du cache, en opérations vectorisées sur ses colonnes"""
+        import numpy as np
+        table = form.score_table
+        size = self.schema.component_size
+        self.products += len(form)
+
+        answered = np.asarray(form.answers) != 0
+        value_codes = ScoreCalculator.encode_answers(np.array(self.schema.values, dtype=object))
+        yes = value_codes[np.asarray(form.answers)] == ANSWER_YES
+        for index, (count, yes_count) in enumerate(zip(answered.sum(axis=0).tolist(), yes.sum(axis=0).tolist())):
+            self.question_answers[index] += count
+            self.question_yes[index] += yes_count
+
+        values_found = np.asarray(table.values_found)
+        yes_counts = np.asarray(table.yes_counts)
+        for index, name in enumerate(EVALUATIONS):
+            found = values_found[:, index]
+            self.answered[name] += int(found.sum())
+            for criterion in range(len(CRITERIA)):
+                counts = np.bincount(yes_counts[found, index, criterion], minlength=size + 1)
+                histogram = self.yes_count_histogram[index][criterion]
+                for yes_count, count in enumerate(counts.tolist()):
+                    histogram[yes_count] += count
+            labels = np.asarray(form.labels)[:, index * 3:(index + 1) * 3].ravel().tolist()
+            self.labels[name].update(label for label in labels if label.strip() != "")
+
+        uses_product = values_found[:, 0]
+        self.certificates["product"] += int(uses_product.sum())
+        self.certificates["service"] += int((~uses_product).sum())
+        self.empty_rows += int((~values_found.any(axis=1)).sum())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Rapport complet, prêt à être écrit en JSON"""
+        size = self.schema.component_size
+        criteria = {}
+        questions = []
+        for index, name in enumerate(EVALUATIONS):
+            criteria[name] = {}
+            for criterion_index, criterion in enumerate(CRITERIA):
+                histogram = self.yes_count_histogram[index][criterion_index]
+                total = sum(histogram)
+                criteria[name][criterion] = {
+                    "description": self.schema.score_descriptions[index][criterion_index],
+                    "yes_count_distribution": histogram,
+                    "mean_yes_count": round(sum(i * n for i, n in enumerate(histogram)) / total, 4) if total else None
+                }
+                descriptions = self.schema.component_descriptions[index][criterion_index]
+                for question, description in enumerate(descriptions):
+                    position = (index * len(CRITERIA) + criterion_index) * size + question
+                    answers = self.question_answers[position]
+                    questions.append({
+                        "evaluation": name,
+                        "criterion": criterion,
+                        "question": description,
+                        "answers": answers,
+                        "yes": self.question_yes[position],
+                        "yes_rate": round(self.question_yes[position] / answers, 4) if answers else None
+                    })
+        return {
+            "products": self.products,
+            "certificates": dict(self.certificates),
+            "rows_with_answers": dict(self.answered),
+            "rows_without_answers": self.empty_rows,
+            "share_without_answers": round(self.empty_rows / self.products, 4) if self.products else None,
+            "criteria": criteria,
+            "questions": questions,
+            "labels": {name: dict(counter.most_common()) for name, counter in self.labels.items()}
+        }
+
+    def rows(self) -> List[List[Any]]:
+        """Rapport à plat (section, évaluation, critère, élément, valeur), pour un CSV"""
+        report = self.to_dict()
+        rows = [["summary", "", "", "products", report["products"]]]
+        for name in EVALUATIONS:
+            rows.append(["certificates", name, "", "count", report["certificates"][name]])
+            rows.append(["rows_with_answers", name, "", "count", report["rows_with_answers"][name]])
+        rows.append(["summary", "", "", "rows_without_answers", report["rows_without_answers"]])
+        rows.append(["summary", "", "", "share_without_answers", report["share_without_answers"]])
+        for name, criteria in report["criteria"].items():
+            for criterion, values in criteria.items():
+                for yes_count, count in enumerate(values["yes_count_distribution"]):
+                    rows.append(["yes_count", name, criterion, yes_count, count])
+                rows.append(["mean_yes_count", name, criterion, "", values["mean_yes_count"]])
+        for question in report["questions"]:
+            rows.append(["yes_rate", question["evaluation"], question["criterion"], question["question"],
+                         question["yes_rate"]])
+        for name, labels in report["labels"].items():
+            for label, count in labels.items():
+                rows.append(["label", name, "", label, count])
+        return rows
+
+    def write(self, path: Path) -> None:
+        """Écrit le rapport en CSV si le fichier se termine par .csv, en JSON sinon"""
+        if path.suffix.lower() == ".csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["section", "evaluation", "criterion", "item", "value"])
+                writer.writerows(self.rows())
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    def write_chart(self, path: Path) -> None:
+        """Trace la répartition des yes_count de chaque critère (nécessite matplotlib)"""
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        size = self.schema.component_size
+        figure, axes = plt.subplots(
+            len(EVALUATIONS), len(CRITERIA), figsize=(4 * len(CRITERIA), 3 * len(EVALUATIONS)),
+            sharey=True, squeeze=False
+        )
+        for index, name in enumerate(EVALUATIONS):
+            for criterion_index, criterion in enumerate(CRITERIA):
+                ax = axes[index][criterion_index]
+                ax.bar(range(size + 1), self.yes_count_histogram[index][criterion_index])
+                ax.set_title(f"{name} - {criterion}", fontsize=10)
+                ax.set_xticks(range(size + 1))
+                ax.set_xlabel("yes_count")
+        for row in axes:
+            row[0].set_ylabel("lignes")
+        figure.suptitle(f"Répartition des scores ({self.products} produits)")
+        figure.tight_layout()
+        figure.savefig(path)
+        plt.close(figure)
+
+
+def print_summary(report: ScoreReport) -> None:
+    """Affiche un résumé du rapport à la place du détail de chaque produit"""
+    summary = report.to_dict()
+    print("\nRésumé des scores :")
+    print("=" * 50)
+    print(f"Certificats produit : {summary['certificates']['product']}, "
+          f"service : {summary['certificates']['service']}, "
+          f"lignes sans réponse : {summary['rows_without_answers']}")
+    for name, criteria in summary["criteria"].items():
+        means = ", ".join(
+            f"{criterion} {values['mean_yes_count']}" for criterion, values in criteria.items()
+        )
+        print(f"Moyenne des yes_count ({name}) : {means}")
+    for name, labels in summary["labels"].items():
+        top = ", ".join(f"{label} ({count})" for label, count in list(labels.items())[:5])
+        print(f"Labels les plus fréquents ({name}) : {top or 'aucun'}")
+    print("=" * 50)
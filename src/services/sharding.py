@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.services.batch_renderer import CertificateJob
+from src.services.certificate_sink import CertificateSink
+from src.services.render_manifest import RenderManifest
+
+SHARD_MANIFEST_VERSION = 1
+SHARD_MANIFEST_FILENAME = ".shard-manifest.jsonl"
+MERGED_MANIFEST_FILENAME = "merged-manifest.json"
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Part d'un formulaire traitée par une machine : la part index sur count.
+
+    Chaque ligne est attribuée à une part d'après une empreinte stable de
+    l'ID du produit (ou de son nom si l'ID est vide) : toutes les machines
+    font le même découpage sans se coordonner, et une ligne ajoutée au CSV
+    ne déplace pas les autres.
+    """
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        """Lit une part au format "i/N" (i de 1 à N)"""
+        try:
+            index, count = (int(part) for part in text.split("/"))
+        except ValueError:
+            raise ValueError(f"Part invalide : {text!r} (format attendu : i/N)")
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Part invalide : {text!r} (i doit être compris entre 1 et N)")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def dirname(self) -> str:
+        """Nom du dossier de sortie de la part"""
+        return f"shard-{self.index:03d}-of-{self.count:03d}"
+
+    @staticmethod
+    def row_key(values: Sequence[Optional[str]]) -> str:
+        """Clé de répartition d'une ligne du CSV : ID du produit, sinon son nom"""
+        product_id = (values[0] or "").strip()
+        return product_id or (values[3] or "").strip()
+
+    def contains(self, key: str) -> bool:
+        """Indique si une clé de répartition appartient à cette part"""
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.count == self.index - 1
+
+    def contains_row(self, values: Sequence[Optional[str]]) -> bool:
+        """Indique si une ligne du CSV appartient à cette part"""
+        return self.contains(self.row_key(values))
+
+
+class ShardManifest(RenderManifest):
+    """Journal des certificats terminés d'une part, pour reprendre après un arrêt.
+
+    Chaque certificat écrit est ajouté immédiatement au journal (une ligne
+    JSON, synchronisée sur le disque) : si la machine s'arrête, une nouvelle
+    exécution de la même part ne génère que les certificats absents du
+    journal, modifiés ou dont le fichier manque. Une ligne incomplète en fin
+    de journal (arrêt pendant l'écriture) est ignorée. À la fin de la part,
+    le journal est réécrit avec un marqueur de fin, que la fusion exige.
+    """
+
+    filename = SHARD_MANIFEST_FILENAME
+
+    def __init__(self, output_dir: Path, generator_config: Dict[str, Any], shard: ShardSpec):
+        """Charge le journal de la part s'il existe.
+
+        Args:
+            output_dir: Dossier des certificats de la part
+            generator_config: Arguments du constructeur de CertificateGenerator
+            shard: Part traitée
+        """
+        self.shard = shard
+        self.rows: Dict[str, int] = {}
+        self.complete = False
+        super().__init__(output_dir, generator_config)
+        self._journal = None
+
+    def _header(self) -> Dict[str, Any]:
+        return {
+            "version": SHARD_MANIFEST_VERSION,
+            "shard": str(self.shard),
+            "config_digest": self.config_digest
+        }
+
+    def _load(self) -> Dict[str, str]:
+        """Relit le journal (vide s'il est absent ou d'une autre part ou configuration)"""
+        entries, rows, complete = read_shard_manifest(self.path)
+        header = entries.pop(None, None)
+        if header != self._header():
+            return {}
+        self.rows = rows
+        self.complete = complete
+        return entries
+
+    def start(self) -> None:
+        """Ouvre le journal pour y ajouter les certificats terminés"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Repartir d'un journal propre, sans ligne incomplète ni ancien marqueur de fin
+        self._rewrite(complete=False)
+        self._journal = open(self.path, "a", encoding="utf-8")
+
+    def record(self, job: CertificateJob, row: int) -> None:
+        """Ajoute un certificat écrit au journal.
+
+        Args:
+            job: Certificat dont le fichier vient d'être écrit
+            row: Numéro de la ligne du produit dans le CSV
+        """
+        certificate_hash = self.certificate_hash(job.score)
+        self.entries[job.filename] = certificate_hash
+        self.rows[job.filename] = row
+        line = {"filename": job.filename, "hash": certificate_hash, "row": row}
+        self._journal.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def finish(self, certificate_jobs: Sequence[CertificateJob], rows: Dict[str, int]) -> List[Path]:
+        """Termine la part : supprime les certificats obsolètes et marque le journal comme complet.
+
+        Args:
+            certificate_jobs: Tous les certificats de la part
+            rows: Numéro de ligne dans le CSV de chaque fichier
+
+        Returns:
+            Chemins des certificats supprimés
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        removed = self.update(certificate_jobs)
+        self.rows = {job.filename: rows[job.filename] for job in certificate_jobs}
+        self.complete = True
+        self._rewrite(complete=True)
+        return removed
+
+    def save(self) -> None:
+        """Écrit le journal de manière atomique, sans le marquer comme complet"""
+        self._rewrite(complete=self.complete)
+
+    def _rewrite(self, complete: bool) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for filename in sorted(self.entries):
+                line = {"filename": filename, "hash": self.entries[filename], "row": self.rows.get(filename, -1)}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            if complete:
+                f.write(json.dumps({"complete": True, "count": len(self.entries)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def read_shard_manifest(path: Path):
+    """Lit le journal d'une part.
+
+    Returns:
+        (empreintes par fichier avec l'en-tête sous la clé None,
+        numéros de ligne par fichier, part terminée ou non)
+    """
+    entries: Dict[Optional[str], Any] = {}
+    rows: Dict[str, int] = {}
+    complete = False
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return entries, rows, complete
+
+    for number, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Ligne interrompue par un arrêt : les suivantes ne peuvent pas exister
+            break
+        if number == 0:
+            entries[None] = record
+        elif record.get("complete"):
+            complete = True
+        else:
+            entries[record["filename"]] = record["hash"]
+            rows[record["filename"]] = record["row"]
+            complete = False
+    return entries, rows, complete
+
+
+def merge_shards(shards_dir: Path, sink: CertificateSink) -> Dict[str, Any]:
+    """Réunit les certificats de toutes les parts dans une seule destination.
+
+    Vérifie que toutes les parts d'un même découpage sont présentes,
+    terminées et générées avec la même configuration. Si plusieurs parts
+    contiennent le même fichier (produits de même nom), celui de la dernière
+    ligne du CSV est gardé, comme lors d'une exécution sans parts.
+
+    Args:
+        shards_dir: Dossier contenant les dossiers des parts
+        sink: Destination des certificats réunis (dossier ou archive ZIP)
+
+    Returns:
+        Manifeste réuni : parts, configuration et, pour chaque fichier, son
+        empreinte, sa ligne et sa part. Il est aussi écrit dans shards_dir.
+
+    Raises:
+        ValueError: Si des parts manquent, sont incomplètes ou incohérentes
+    """
+    shards = {}
+    for shard_dir in sorted(shards_dir.glob("shard-*-of-*")):
+        entries, rows, complete = read_shard_manifest(shard_dir / SHARD_MANIFEST_FILENAME)
+        header = entries.pop(None, None)
+        if header is None or header.get("version") != SHARD_MANIFEST_VERSION:
+            raise ValueError(f"Journal absent ou illisible dans {shard_dir}")
+        if not complete:
+            raise ValueError(f"La part {header['shard']} n'est pas terminée ({shard_dir})")
+        shards[ShardSpec.parse(header["shard"])] = (shard_dir, header, entries, rows)
+    if not shards:
+        raise ValueError(f"Aucune part trouvée dans {shards_dir}")
+
+    counts = {shard.count for shard in shards}
+    if len(counts) != 1:
+        raise ValueError(f"Parts de découpages différents dans {shards_dir} : {sorted(counts)}")
+    count = counts.pop()
+    missing = [str(ShardSpec(index, count)) for index in range(1, count + 1) if ShardSpec(index, count) not in shards]
+    if missing:
+        raise ValueError(f"Parts manquantes : {', '.join(missing)}")
+    digests = {header["config_digest"] for _, header, _, _ in shards.values()}
+    if len(digests) != 1:
+        raise ValueError("Les parts n'ont pas été générées avec la même configuration")
+
+    # Pour chaque fichier, la part qui contient sa dernière ligne dans le CSV
+    certificates: Dict[str, Dict[str, Any]] = {}
+    for shard, (shard_dir, _, entries, rows) in sorted(shards.items(), key=lambda item: item[0].index):
+        for filename, certificate_hash in entries.items():
+            current = certificates.get(filename)
+            if current is None or rows[filename] > current["row"]:
+                certificates[filename] = {"hash": certificate_hash, "row": rows[filename], "shard": str(shard)}
+
+    with sink:
+        for filename, certificate in sorted(certificates.items(), key=lambda item: item[1]["row"]):
+            shard_dir = shards[ShardSpec.parse(certificate["shard"])][0]
+            sink.write(filename, (shard_dir / filename).read_bytes())
+
+    merged = {
+        "version": SHARD_MANIFEST_VERSION,
+        "shards": count,
+        "config_digest": digests.pop(),
+        "certificates": certificates
+    }
+    tmp_path = shards_dir / f"{MERGED_MANIFEST_FILENAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, shards_dir / MERGED_MANIFEST_FILENAME)
+    return merged